@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from prophet import Prophet
 import os
-from groq import Groq
+import sys
+import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.llm import get_llm, chat_messages, estimate_tokens
+from shared.forecast_digest import forecast_digest
+from shared.baselines import ENGINE_NAMES, get_engine, infer_offset, horizon_steps, forecast_series, prepare_long_frame
+
 # 🌱 Load API key securely
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -13,11 +18,71 @@ if not GROQ_API_KEY:
     st.error("🚨 API Key is missing! Set it in Streamlit Secrets or a .env file.")
     st.stop()
 
+# 💾 Fitted models survive reruns, so moving the slider only re-runs predict
+@st.cache_resource
+def get_model_cache():
+    from shared.prophet_cache import ProphetModelCache
+    return ProphetModelCache()
+
 # 🎨 Streamlit UI Styling
 st.set_page_config(page_title="📈 Forecast Revenue with Prophet", page_icon="📊", layout="wide")
 st.title("📈 Revenue Forecasting with Prophet")
 st.markdown("Upload your Excel file with `Date` and `Revenue` columns to forecast future revenue using Prophet.")
 
+forecast_mode = st.radio("Forecast mode", ["Single series", "Batch (many series)"], horizontal=True)
+
+# 📦 Batch mode: one Prophet model per series fitted in parallel, or a vectorized baseline over all series
+if forecast_mode == "Batch (many series)":
+    st.markdown("Upload a long-format Excel file with `series_id`, `Date` and `Revenue` columns (one row per series and date).")
+    batch_file = st.file_uploader("Upload Excel File", type=["xlsx"], key="batch_file")
+    if not batch_file:
+        st.stop()
+
+    raw = pd.read_excel(batch_file)
+    if not {'series_id', 'Date', 'Revenue'}.issubset(raw.columns):
+        st.error("The file must contain 'series_id', 'Date' and 'Revenue' columns.")
+        st.stop()
+
+    long_df = prepare_long_frame(raw, id_col="series_id", date_col="Date", value_col="Revenue")
+    n_series = long_df["series_id"].nunique()
+    st.write(f"📊 {n_series} series, {len(long_df)} rows")
+
+    engine_name = st.selectbox("Forecast engine", ENGINE_NAMES, key="batch_engine",
+                               help="The NumPy baselines forecast every series in one vectorized pass.")
+    future_periods = st.slider("Select forecast period (months)", 1, 24, 6, key="batch_periods")
+    prophet_options = {}
+    if engine_name == "Prophet":
+        series_timeout = st.number_input("Per-series timeout (seconds)", min_value=5, value=120, step=5)
+        prophet_options = {"timeout": series_timeout, "cache_dir": get_model_cache().cache_dir}
+
+    if st.button("🚀 Run batch forecast"):
+        if engine_name == "Prophet":
+            progress = st.progress(0.0)
+            status = st.empty()
+
+            def report(done, total, result):
+                progress.progress(done / total)
+                status.write(f"✅ {done}/{total} done (last: {result.series_id}, {result.seconds:.1f}s)")
+
+            prophet_options["on_result"] = report
+
+        # ⚡ Array engines forecast all series in one pass; Prophet fits one model per series in a pool
+        engine = get_engine(engine_name, **prophet_options)
+        offset = infer_offset(long_df["ds"])
+        start = time.perf_counter()
+        combined = engine.forecast_long(long_df, horizon_steps(offset, future_periods * 30), offset)
+        st.caption(f"⚡ {engine_name}: {n_series} series in {time.perf_counter() - start:.2f}s")
+        failures = getattr(engine, "failures", [])
+
+        st.subheader("📈 Batch Forecast")
+        st.dataframe(combined)
+        if failures:
+            st.warning(f"{len(failures)} series could not be forecast.")
+            st.dataframe(pd.DataFrame(failures))
+        st.download_button("📥 Download Batch Forecast (CSV)", combined.to_csv(index=False),
+                           file_name="batch_forecast.csv", mime="text/csv")
+    st.stop()
+
 # 📤 File Upload
 uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx"])
 if uploaded_file:
@@ -36,32 +101,100 @@ if uploaded_file:
     st.subheader("📊 Uploaded Data")
     st.dataframe(df)
 
-    # ⏱ Forecasting with Prophet
-    model = Prophet()
-    model.fit(df)
-
+    engine_name = st.selectbox("Forecast engine", ENGINE_NAMES,
+                               help="Prophet fits one Stan model; the NumPy baselines answer in milliseconds.")
     future_periods = st.slider("Select forecast period (months)", 1, 24, 6)
-    future = model.make_future_dataframe(periods=future_periods * 30, freq='D')
-    forecast = model.predict(future)
-
-    # 📈 Plot Forecast
-    st.subheader("📈 Forecast Plot")
-    fig1 = model.plot(forecast)
-    st.pyplot(fig1)
 
-    st.subheader("🔍 Forecast Components")
-    fig2 = model.plot_components(forecast)
-    st.pyplot(fig2)
+    if engine_name == "Prophet":
+        from shared.prophet_cache import fingerprint, future_frame
+        from shared.backtest import run_backtest, count_folds, summarize_backtest, best_params
+
+        # 🧪 Backtest & tune: rolling-origin folds for every grid cell, spread over a process pool
+        tuned = st.session_state.setdefault("tuned_params", {})
+        data_key = fingerprint(df)
+        with st.expander("🧪 Backtest & tune hyperparameters"):
+            cps = st.multiselect("changepoint_prior_scale", [0.001, 0.01, 0.05, 0.1, 0.5], default=[0.01, 0.05, 0.5])
+            modes = st.multiselect("seasonality_mode", ["additive", "multiplicative"], default=["additive", "multiplicative"])
+            col1, col2 = st.columns(2)
+            with col1:
+                holdout = st.number_input("Held-out rows per fold", min_value=1, value=max(min(30, len(df) // 4), 1))
+            with col2:
+                n_folds = st.slider("Folds", 1, 10, 3)
+
+            if st.button("Run backtest"):
+                grid = {"changepoint_prior_scale": cps, "seasonality_mode": modes}
+                total = count_folds(len(df), grid, horizon=holdout, n_folds=n_folds)
+                if not total:
+                    st.warning("Not enough history for these folds, or an empty grid.")
+                else:
+                    progress = st.progress(0.0)
+                    results = []
+                    for i, result in enumerate(run_backtest(df, grid, horizon=holdout, n_folds=n_folds), start=1):
+                        results.append(result)
+                        progress.progress(i / total)
+
+                    summary = summarize_backtest(results)
+                    st.caption(f"{sum(r.cached for r in results)}/{total} folds reused from cache")
+                    st.dataframe(summary.drop(columns=["params"]))
+                    tuned[data_key] = best_params(summary)
+
+            if tuned.get(data_key):
+                st.success(f"Live forecast uses the best configuration: {tuned[data_key]}")
+
+        # ⏱ Forecasting with Prophet (fit is cached per data + hyperparameters)
+        params = tuned.get(data_key, {})
+        incremental = st.checkbox("♻️ Incremental refit when new rows are appended", value=True,
+                                  help="Start from the previous fit of this series, or reuse it for small updates.")
+        if incremental:
+            skip_below = st.sidebar.slider("Skip refit below (% new rows)", 0.0, 10.0, 2.0, step=0.5)
+            model, fit = get_model_cache().get_or_update(df, threshold=skip_below / 100, **params)
+            if fit.mode == "cold":
+                st.caption(f"🧊 Full fit in {fit.seconds:.2f}s")
+            elif fit.cold_seconds:
+                st.caption(f"♻️ {fit.mode.capitalize()} fit ({fit.new_rows} new rows) in {fit.seconds:.2f}s, "
+                           f"~{max(fit.cold_seconds - fit.seconds, 0):.2f}s saved vs a full fit")
+        else:
+            model = get_model_cache().get_or_fit(df, **params)
+        future = future_frame(df, future_periods * 30, freq='D')
+        forecast = model.predict(future)
+
+        # 📈 Plot Forecast
+        st.subheader("📈 Forecast Plot")
+        fig1 = model.plot(forecast)
+        st.pyplot(fig1)
+
+        st.subheader("🔍 Forecast Components")
+        fig2 = model.plot_components(forecast)
+        st.pyplot(fig2)
+    else:
+        # ⚡ Vectorized baseline at the data's own frequency
+        model = None
+        offset = infer_offset(df["ds"])
+        start = time.perf_counter()
+        forecast = forecast_series(df, get_engine(engine_name), horizon_steps(offset, future_periods * 30), offset)
+        st.caption(f"⚡ {engine_name} forecast in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        st.subheader("📈 Forecast Plot")
+        fig1, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(df["ds"], df["y"], "k.", label="Actual")
+        ax.plot(forecast["ds"], forecast["yhat"], label=f"{engine_name} forecast")
+        ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"], alpha=0.2, label="80% interval")
+        ax.legend()
+        st.pyplot(fig1)
 
     # 🧠 AI Analysis using Groq
     st.subheader("🤖 AI Analysis of Forecast")
-    client = Groq(api_key=GROQ_API_KEY)
+    llm = get_llm(GROQ_API_KEY)
 
-    json_forecast = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(future_periods * 30).to_json(orient="records")
+    # 🗜 Fixed-size digest instead of raw rows, so the prompt does not grow with the horizon
+    digest_tokens = st.sidebar.slider("Forecast digest budget (tokens)", 200, 2000, 800, step=100)
+    digest = forecast_digest(forecast, history=df, model=model, max_tokens=digest_tokens)
+    with st.expander(f"🗜 Forecast digest sent to the model (~{estimate_tokens(digest)} tokens)"):
+        st.text(digest)
 
     prompt = f"""
-    You are an expert financial forecaster. Given the following Prophet model forecast data in JSON:
-    {json_forecast}
+    You are an expert financial forecaster. Given the following summary of a {engine_name} forecast:
+    {digest}
 
     Please provide:
     - Key trends observed in the forecast.
@@ -70,14 +203,5 @@ if uploaded_file:
     - Strategic recommendations based on the forecast.
     """
 
-    response = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are a strategic financial advisor and forecaster."},
-            {"role": "user", "content": prompt}
-        ],
-        model="llama3-8b-8192",
-    )
-
-    ai_insight = response.choices[0].message.content
     st.markdown("### 🧾 AI Forecast Commentary")
-    st.write(ai_insight)
+    st.write_stream(llm.stream(chat_messages("You are a strategic financial advisor and forecaster.", prompt)))
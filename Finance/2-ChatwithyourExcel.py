@@ -1,8 +1,13 @@
 import streamlit as st
-import pandas as pd
 import os
-from groq import Groq
+import sys
 from dotenv import load_dotenv
+from excel_loader import file_hash, preferred_engine, list_sheets, load_sheet, sheet_schema, page_count, page_slice
+from profiler import profile_frame, summarize_profile
+from query_engine import QueryError, query_prompt, parse_query, run_query, answer_prompt
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.llm import get_llm, chat_messages
 
 # Load API key securely
 load_dotenv()
@@ -18,62 +23,88 @@ st.title("📊 Chat with your Excel by Christian Martinez")
 # Upload Excel File
 uploaded_file = st.file_uploader("📂 Upload your Excel file", type=["xls", "xlsx"])
 
+EXCEL_ENGINE = preferred_engine()
+
+@st.cache_data(max_entries=16)
+def get_sheet_names(digest, _data):
+    return list_sheets(_data, engine=EXCEL_ENGINE)
+
+@st.cache_data(max_entries=32)
+def get_sheet(digest, sheet_name, _data):
+    return load_sheet(_data, sheet_name, engine=EXCEL_ENGINE)
+
 def process_file(uploaded_file):
-    """Reads the uploaded Excel file and returns a dictionary of DataFrames."""
+    """Lists the sheets of the uploaded Excel file without parsing them; returns (file hash, bytes, sheet names)."""
     try:
-        xls = pd.ExcelFile(uploaded_file)
-        dataframes = {sheet: xls.parse(sheet) for sheet in xls.sheet_names}
-        return dataframes
+        data = uploaded_file.getvalue()
+        digest = file_hash(data)
+        return digest, data, get_sheet_names(digest, data)
     except Exception as e:
         st.error(f"Error reading file: {e}")
         return None
 
-def summarize_data(df):
-    """Generates a summary of the DataFrame to reduce data size before sending it to the AI."""
-    summary = {
-        "columns": list(df.columns),
-        "num_rows": len(df),
-        "num_columns": len(df.columns),
-        "missing_values": df.isnull().sum().to_dict(),
-        "summary_stats": df.describe().to_dict()
-    }
-    return summary
+@st.cache_data(max_entries=64)
+def get_schema(digest, sheet_name, _data):
+    return sheet_schema(_data, sheet_name, engine=EXCEL_ENGINE)
+
+def analyst_messages(prompt):
+    return chat_messages("You are an expert data analyst.", prompt)
+
+@st.cache_data(max_entries=32)
+def summarize_data(digest, sheet_name, _df):
+    """Profiles the sheet in one chunked pass and returns a compact, token-bounded summary for the AI."""
+    return summarize_profile(profile_frame(_df))
 
 if uploaded_file:
-    sheets = process_file(uploaded_file)
-    if sheets:
-        sheet_name = st.selectbox("📑 Select a sheet to analyze", list(sheets.keys()))
-        df = sheets[sheet_name]
+    workbook = process_file(uploaded_file)
+    if workbook:
+        digest, data, sheet_names = workbook
+        sheet_name = st.selectbox("📑 Select a sheet to analyze", sheet_names)
+        # Only the chosen sheet is parsed, once per file
+        df = get_sheet(digest, sheet_name, data)
         st.write("### Preview of Selected Sheet")
-        st.dataframe(df)
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1)
+        with col2:
+            page = st.number_input(f"Page (of {page_count(df, page_size)})", min_value=1, max_value=page_count(df, page_size), value=1)
+        st.dataframe(page_slice(df, page, page_size))
+        st.caption(f"{len(df):,} rows × {len(df.columns)} columns")
 
         # Generate a summarized version of the data
-        data_summary = summarize_data(df)
+        data_summary = summarize_data(digest, sheet_name, df)
 
         # User Input for Question
         user_query = st.text_area("📝 Ask a question about the data")
+        use_query_engine = st.checkbox("🧮 Answer from computed results (runs a query on the workbook)", value=True)
 
         if st.button("🔍 Analyze with AI") and user_query:
-            client = Groq(api_key=GROQ_API_KEY)
-            prompt = f"""
-            You are an AI data analyst. Below is a summary of the dataset:
-            {data_summary}
-            Based on this, answer the following question:
-            {user_query}
-            """
-
-            response = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are an expert data analyst."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama3-8b-8192",
-            )
-
-            ai_response = response.choices[0].message.content
-            
-            # Display AI Response
+            llm = get_llm(GROQ_API_KEY)
+            prompt = None
+
+            if use_query_engine:
+                # Plan a structured query, run it locally and send only the result to the AI
+                schemas = {sheet: get_schema(digest, sheet, data) for sheet in sheet_names}
+                try:
+                    query = parse_query(llm.complete(analyst_messages(query_prompt(user_query, schemas))))
+                    result = run_query(query, lambda name: get_sheet(digest, name, data))
+                    with st.expander("🧮 Query and computed result"):
+                        st.json(query)
+                        st.dataframe(result)
+                    prompt = answer_prompt(user_query, query, result)
+                except QueryError as e:
+                    st.warning(f"Could not compute an exact answer ({e}); falling back to the data summary.")
+
+            if prompt is None:
+                prompt = f"""
+                You are an AI data analyst. Below is a summary of the dataset:
+                {data_summary}
+                Based on this, answer the following question:
+                {user_query}
+                """
+
+            # Display AI Response as it streams in
             st.subheader("🤖 AI Response")
-            st.write(ai_response)
+            st.write_stream(llm.stream(analyst_messages(prompt)))
     else:
         st.error("Failed to process the uploaded file. Please try again.")
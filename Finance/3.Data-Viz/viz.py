@@ -4,9 +4,12 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-from groq import Groq
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.llm import get_llm, chat_messages
+
 # Load API key securely
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -41,35 +44,25 @@ q1 = st.radio("1. What is your primary goal?", ["Automate financial reporting",
 q2 = st.radio("2. How comfortable are you with coding?", ["Beginner (No experience)", "Intermediate (Some experience)", "Advanced (Fluent in Python)"], index=0)
 q3 = st.radio("3. How much time can you dedicate to learning?", ["A few hours per week", "Several hours per week", "Full-time commitment"], index=0)
 
-# AI Commentary Generation
-try:
-    client = Groq(api_key=GROQ_API_KEY)
-    prompt = f"""
-    You are an AI FP&A coach. Based on the user's answers:
-    - Recommend whether they should learn Python in Excel, ChatGPT, or Machine Learning.
-    - Provide an explanation and next steps.
-    Here are their responses:
-    1. {q1}
-    2. {q2}
-    3. {q3}
-    """
-
-    response = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are a financial planning and analysis (FP&A) learning advisor."},
-            {"role": "user", "content": prompt}
-        ],
-        model="llama3-8b-8192",
-    )
-
-    ai_recommendation = response.choices[0].message.content
-except Exception as e:
-    ai_recommendation = f"Error generating AI response: {e}"
+# AI Commentary Generation (answers are cached per combination of responses)
+prompt = f"""
+You are an AI FP&A coach. Based on the user's answers:
+- Recommend whether they should learn Python in Excel, ChatGPT, or Machine Learning.
+- Provide an explanation and next steps.
+Here are their responses:
+1. {q1}
+2. {q2}
+3. {q3}
+"""
 
 # Display AI Recommendation
 st.markdown('<div class="analysis-container">', unsafe_allow_html=True)
 st.subheader("🧠 AI-Powered Learning Recommendation")
-st.write(ai_recommendation)
+try:
+    llm = get_llm(GROQ_API_KEY)
+    st.write_stream(llm.stream(chat_messages("You are a financial planning and analysis (FP&A) learning advisor.", prompt)))
+except Exception as e:
+    st.write(f"Error generating AI response: {e}")
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Ensure dependencies are installed
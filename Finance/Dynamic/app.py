@@ -1,6 +1,13 @@
+import os
+import sys
+
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+from variance import hide_details, style_amounts, variance_view
+from workbook import DynamicWorkbook, WorkbookError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from excel_loader import file_hash, preferred_engine
 
 st.set_page_config(layout="wide")
 st.sidebar.title("📊 Navigazione")
@@ -15,11 +22,25 @@ if not uploaded_ce or not uploaded_mappings or not uploaded_output:
     st.warning("⚠️ Carica tutti e tre i file per continuare.")
     st.stop()
 
-# Read Excel files
-conto = pd.read_excel(uploaded_ce, sheet_name="Conto Economico")
-mappings = pd.read_excel(uploaded_mappings, sheet_name="Conto_Economico")
-# Placeholder: you can use this for future features
-output_design = pd.read_excel(uploaded_output, sheet_name=0)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_workbook(ce_hash, mappings_hash, output_hash, _ce_bytes, _mappings_bytes, _output_bytes):
+    """Parse every sheet once per upload; keyed by the file hashes and shared as-is, without pickling per rerun."""
+    return DynamicWorkbook(_ce_bytes, _mappings_bytes, _output_bytes, engine=preferred_engine())
+
+
+ce_bytes, mappings_bytes, output_bytes = (f.getvalue() for f in (uploaded_ce, uploaded_mappings, uploaded_output))
+try:
+    workbook = load_workbook(
+        file_hash(ce_bytes), file_hash(mappings_bytes), file_hash(output_bytes),
+        ce_bytes, mappings_bytes, output_bytes,
+    )
+except WorkbookError as e:
+    st.error(f"🚨 {e}")
+    st.stop()
+
+for warning in workbook.warnings:
+    st.sidebar.warning(f"⚠️ {warning}")
 
 pagina = st.sidebar.radio("Seleziona la sezione:", [
     "Conto Economico",
@@ -27,114 +48,98 @@ pagina = st.sidebar.radio("Seleziona la sezione:", [
     "Rendiconto Finanziario"
 ])
 
-def format_miles(x):
-    try:
-        return f"{x:,.0f}".replace(",", ".")
-    except:
-        return x
-
-def format_percent(x):
-    try:
-        return f"{x:.1%}"
-    except:
-        return x
-
 if pagina == "Conto Economico":
     st.title("📘 Conto Economico")
 
-    conto = conto.fillna(0)
-    mappings = mappings[["Voce", "Tipo"]]
-    df = pd.merge(conto, mappings, on="Voce", how="left")
-    df = df.drop_duplicates(subset=["Voce"], keep="first")
-
-    periodi = list(conto.columns[1:4])
-    index1 = 2 if len(periodi) > 2 else len(periodi) - 1
-    index2 = 1 if len(periodi) > 1 else 0
-
-    col1, col2 = st.columns(2)
-    with col1:
-        periodo_1 = st.selectbox("Periodo 1", periodi, index=index1)
-    with col2:
-        periodo_2 = st.selectbox("Periodo 2", periodi, index=index2)
-
-    df["Δ"] = df[periodo_1] - df[periodo_2]
-    df["Δ %"] = np.where(
-        df[periodo_2] != 0,
-        (df[periodo_1] - df[periodo_2]) / abs(df[periodo_2]),
-        np.nan
-    )
-
-    mostrar_detalles = st.checkbox("Mostrar dettagli", value=False)
-
-    output = []
-    for tipo in df["Tipo"].dropna().unique():
-        subset = df[df["Tipo"] == tipo]
-        total = subset[[periodo_1, periodo_2, "Δ"]].sum().to_dict()
-        delta_pct = (total["Δ"] / abs(total[periodo_2])) if total[periodo_2] != 0 else np.nan
-        riga_totale = {
-            "Tipo": tipo,
-            periodo_1: total[periodo_1],
-            periodo_2: total[periodo_2],
-            "Δ": total["Δ"],
-            "Δ %": delta_pct
-        }
-        output.append(riga_totale)
-
-        if mostrar_detalles and tipo in ["Vendite", "Altri Opex"]:
-            for _, row in subset.iterrows():
-                r = {
-                    "Tipo": row["Tipo"],
-                    "Voce": row["Voce"],
-                    periodo_1: row[periodo_1],
-                    periodo_2: row[periodo_2],
-                    "Δ": row["Δ"],
-                    "Δ %": row["Δ %"]
-                }
-                output.append(r)
-
-    kpi_fissi = ["Marginalità Vendite lorda", "EBITDA", "EBIT", "EBT", "Risultato di Gruppo"]
-    kpi_rows = df[df["Voce"].isin(kpi_fissi) & df["Tipo"].isna()].copy()
-    for _, row in kpi_rows.iterrows():
-        r = {
-            "Tipo": "",
-            "Voce": row["Voce"],
-            periodo_1: row[periodo_1],
-            periodo_2: row[periodo_2],
-            "Δ": row["Δ"],
-            "Δ %": row["Δ %"]
-        }
-        output.append(r)
-
-    df_resultado = pd.DataFrame(output)
-
-    for col in [periodo_1, periodo_2, "Δ"]:
-        df_resultado[col] = df_resultado[col].apply(format_miles)
-
-    df_resultado["Δ %"] = df_resultado["Δ %"].apply(format_percent)
-
-    if not mostrar_detalles:
-        df_resultado = df_resultado.drop(columns=["Voce"], errors="ignore")
-
-    st.dataframe(df_resultado, use_container_width=True, height=800)
+    # Changing periods or mode only recomputes the compared columns of the parsed table
+    cube = workbook.cube
+    periodi = cube.periodi
+
+    modalita = st.radio("Confronto", ["Due periodi", "Matrice", "Finestra mobile"], horizontal=True)
+
+    if modalita == "Due periodi":
+        index1 = 2 if len(periodi) > 2 else len(periodi) - 1
+        index2 = 1 if len(periodi) > 1 else 0
+
+        col1, col2 = st.columns(2)
+        with col1:
+            periodo_1 = st.selectbox("Periodo 1", periodi, index=index1)
+        with col2:
+            periodo_2 = st.selectbox("Periodo 2", periodi, index=index2)
+
+        mostrar_detalles = st.checkbox("Mostrar dettagli", value=False)
+        view = variance_view(cube, periodo_1, periodo_2, mostrar_detalles).reset_index()
+
+        if not mostrar_detalles:
+            view = view.drop(columns=["Voce"])
+
+        st.dataframe(
+            style_amounts(view, [periodo_1, periodo_2, "Δ"], ["Δ %"]),
+            use_container_width=True, height=800
+        )
+
+    elif modalita == "Matrice":
+        righe = list(hide_details(cube.table).index)
+        col1, col2 = st.columns(2)
+        with col1:
+            riga = st.selectbox("Voce", righe, format_func=lambda r: r[1] or r[0])
+        with col2:
+            in_percentuale = st.checkbox("Δ %", value=False)
+
+        st.caption("Ogni cella confronta il periodo di riga con il periodo di colonna.")
+        matrice = cube.matrix(riga, percent=in_percentuale)
+        colonne = list(matrice.columns)
+        st.dataframe(
+            style_amounts(matrice, [] if in_percentuale else colonne, colonne if in_percentuale else []),
+            use_container_width=True, height=800
+        )
+
+    else:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            inizio = st.selectbox("Periodo iniziale", periodi)
+        with col2:
+            finestra = st.number_input("Numero di periodi", min_value=2, max_value=max(len(periodi), 2),
+                                       value=max(min(len(periodi), 12), 2))
+        with col3:
+            lag = st.number_input("Confronta con N periodi prima", min_value=1,
+                                  max_value=max(len(periodi) - 1, 1), value=1)
+
+        mostrar_detalles = st.checkbox("Mostrar dettagli", value=False)
+        in_percentuale = st.checkbox("Δ %", value=False)
+
+        view = cube.rolling(inizio, int(finestra), int(lag), percent=in_percentuale)
+        senza_base = periodi[periodi.index(inizio):int(lag)]
+        if senza_base:
+            st.caption(f"ℹ️ Nessun periodo {int(lag)} prima di: {', '.join(map(str, senza_base))} (colonne vuote)")
+        if len(view.columns) < int(finestra):
+            st.caption(f"ℹ️ La finestra si ferma all'ultimo periodo: {len(view.columns)} periodi su {int(finestra)}")
+        if not mostrar_detalles:
+            view = hide_details(view)
+        colonne = list(view.columns)
+        view = view.reset_index()
+        if not mostrar_detalles:
+            view = view.drop(columns=["Voce"])
+
+        st.dataframe(
+            style_amounts(view, [] if in_percentuale else colonne, colonne if in_percentuale else []),
+            use_container_width=True, height=800
+        )
 
 elif pagina == "Stato Patrimoniale + Indicatori":
     st.title("🏦 Stato Patrimoniale + Indicatori")
-    df = pd.read_excel(uploaded_ce, sheet_name="Stato Patrimoniale")
-    df = df.fillna(0)
-    df.iloc[:, 1:] = df.iloc[:, 1:].applymap(format_miles)
-    st.dataframe(df, use_container_width=True, height=800)
+    df = workbook.stato_patrimoniale
+    if df is None:
+        st.warning("⚠️ Foglio 'Stato Patrimoniale' non presente nel file.")
+        st.stop()
+    importi = df.columns[1:].intersection(df.select_dtypes("number").columns)
+    st.dataframe(style_amounts(df, importi), use_container_width=True, height=800)
 
 elif pagina == "Rendiconto Finanziario":
     st.title("💧 Rendiconto Finanziario")
-    df = pd.read_excel(uploaded_ce, sheet_name="Rendiconto Finanziario")
-    df = df.fillna(0)
-
-    if df.shape[1] > 1:
-        prima_colonna = df.columns[0]
-        df[prima_colonna] = pd.to_numeric(df[prima_colonna], errors='coerce')
-        df = df.sort_values(by=prima_colonna).drop(columns=[prima_colonna])
-
-        col_val = df.columns[1]
-        df[col_val] = df[col_val].apply(format_miles)
-
-    st.dataframe(df, use_container_width=True, height=800)
+    df = workbook.rendiconto
+    if df is None:
+        st.warning("⚠️ Foglio 'Rendiconto Finanziario' non presente nel file.")
+        st.stop()
+    importi = df.columns[1:2].intersection(df.select_dtypes("number").columns)
+    st.dataframe(style_amounts(df, importi), use_container_width=True, height=800)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+KPI_FISSI = ["Marginalità Vendite lorda", "EBITDA", "EBIT", "EBT", "Risultato di Gruppo"]
+DETAIL_TYPES = ["Vendite", "Altri Opex"]
+
+
+def conto_economico(df, periodi, detail_types=DETAIL_TYPES, kpi=KPI_FISSI):
+    """Totals per Tipo for every period in one group-by, with optional Voce details and fixed KPI rows.
+
+    df is the Conto Economico merged with the Tipo mapping. The result is indexed by
+    (Tipo, Voce): total rows have Voce "", detail rows follow their total, and KPI rows
+    (Voce in kpi without a Tipo) come last with Tipo "". Values stay numeric.
+    """
+    tipi = df["Tipo"].dropna().unique()
+    rank = {tipo: i for i, tipo in enumerate(tipi)}
+
+    totals = df.groupby("Tipo", sort=False)[periodi].sum()
+    totals.index = pd.MultiIndex.from_arrays([totals.index, [""] * len(totals)], names=["Tipo", "Voce"])
+    totals_order = np.column_stack([totals.index.get_level_values("Tipo").map(rank), np.zeros(len(totals)), np.zeros(len(totals))])
+
+    detail_rows = df[df["Tipo"].isin(detail_types)]
+    details = detail_rows.set_index(["Tipo", "Voce"])[periodi]
+    details_order = np.column_stack([
+        detail_rows["Tipo"].map(rank).to_numpy(), np.ones(len(detail_rows)), np.arange(len(detail_rows))
+    ])
+
+    # Totals first, each followed by its details in ledger order
+    order = np.vstack([totals_order, details_order])
+    table = pd.concat([totals, details])
+    table = table.iloc[np.lexsort((order[:, 2], order[:, 1], order[:, 0]))]
+
+    kpi_rows = df[df["Voce"].isin(kpi) & df["Tipo"].isna()]
+    kpis = kpi_rows.assign(Tipo="").set_index(["Tipo", "Voce"])[periodi]
+    return pd.concat([table, kpis])
+
+
+class VarianceCube:
+    """Δ and Δ % between periods of a (Tipo, Voce) table, computed on demand from its values.
+
+    Only the (rows, periods) array is kept; each pair, matrix or rolling comparison
+    subtracts the columns it needs, so memory stays linear in the number of periods.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.periodi = list(table.columns)
+        self.values = table.to_numpy(dtype=float)
+
+    def _pos(self, periodo):
+        return self.periodi.index(periodo)
+
+    @staticmethod
+    def _compare(current, base, percent):
+        """current minus base, or divided by |base| (NaN where base is 0) when percent."""
+        delta = current - base
+        if not percent:
+            return delta
+        base = np.abs(base)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(base != 0, delta / base, np.nan)
+
+    def pair(self, periodo_1, periodo_2):
+        current, base = self.values[:, self._pos(periodo_1)], self.values[:, self._pos(periodo_2)]
+        return self.table[[periodo_1, periodo_2]].assign(**{
+            "Δ": self._compare(current, base, False),
+            "Δ %": self._compare(current, base, True),
+        })
+
+    def matrix(self, row, percent=False):
+        """Period × period matrix for one row: cell (i, j) compares period i against period j."""
+        values = self.values[self.table.index.get_loc(row)]
+        return pd.DataFrame(self._compare(values[:, None], values[None, :], percent),
+                            index=self.periodi, columns=self.periodi)
+
+    def rolling(self, start, window, lag=1, percent=False):
+        """Each period in a window of `window` periods from `start` against the one `lag` periods before.
+
+        Periods without one `lag` periods earlier stay in the frame as NaN columns; the window
+        only comes out shorter when it runs past the last period.
+        """
+        first = self._pos(start)
+        positions = np.arange(first, min(first + window, len(self.periodi)))
+        values = np.full((len(self.values), len(positions)), np.nan)
+        has_base = positions >= lag
+        compared = positions[has_base]
+        values[:, has_base] = self._compare(self.values[:, compared], self.values[:, compared - lag], percent)
+        return pd.DataFrame(values, index=self.table.index, columns=[self.periodi[p] for p in positions])
+
+
+def hide_details(frame):
+    """Keep total and KPI rows only."""
+    is_detail = (frame.index.get_level_values("Tipo") != "") & (frame.index.get_level_values("Voce") != "")
+    return frame[~is_detail]
+
+
+def variance_view(cube, periodo_1, periodo_2, show_details):
+    """Two periods with Δ and Δ % sliced from the cube, dropping details unless asked for."""
+    view = cube.pair(periodo_1, periodo_2)
+    return view if show_details else hide_details(view)
+
+
+def style_amounts(frame, amount_columns, percent_columns=()):
+    """Display-time formatting: thousands with '.' separators and percentages with one decimal."""
+    return (
+        frame.style
+        .format("{:,.0f}", subset=list(amount_columns), thousands=".", na_rep="")
+        .format("{:.1%}", subset=list(percent_columns), na_rep="")
+    )
@@ -0,0 +1,89 @@
+import io
+
+import pandas as pd
+
+from variance import KPI_FISSI, VarianceCube, conto_economico
+
+SHEET_CONTO = "Conto Economico"
+SHEET_STATO = "Stato Patrimoniale"
+SHEET_RENDICONTO = "Rendiconto Finanziario"
+SHEET_MAPPINGS = "Conto_Economico"
+
+
+class WorkbookError(ValueError):
+    """An uploaded file is missing a sheet or a column the app needs."""
+
+
+def read_sheets(data, sheet_names, label, required=(), engine=None):
+    """Parse the listed sheets in a single pass over the workbook; absent optional sheets map to None."""
+    with pd.ExcelFile(io.BytesIO(data), engine=engine) as xls:
+        missing = [name for name in required if name not in xls.sheet_names]
+        if missing:
+            raise WorkbookError(f"{label}: fogli mancanti {', '.join(missing)}")
+        return {name: xls.parse(name) if name in xls.sheet_names else None for name in sheet_names}
+
+
+def check_mappings(conto, mappings, kpi=KPI_FISSI):
+    """Validate the Voce -> Tipo join and return a list of warnings."""
+    for frame, label in ((conto, SHEET_CONTO), (mappings, SHEET_MAPPINGS)):
+        if "Voce" not in frame.columns:
+            raise WorkbookError(f"{label}: colonna 'Voce' mancante")
+    if "Tipo" not in mappings.columns:
+        raise WorkbookError(f"{SHEET_MAPPINGS}: colonna 'Tipo' mancante")
+
+    warnings = []
+    tipi = mappings.dropna(subset=["Tipo"]).groupby("Voce")["Tipo"].nunique()
+    conflicting = list(tipi[tipi > 1].index)
+    if conflicting:
+        warnings.append(f"Voci mappate su più Tipi (vale il primo): {', '.join(map(str, conflicting))}")
+
+    mapped = set(mappings.dropna(subset=["Tipo"])["Voce"])
+    unmapped = [voce for voce in conto["Voce"].dropna().unique() if voce not in mapped and voce not in kpi]
+    if unmapped:
+        warnings.append(f"Voci senza Tipo, escluse dai totali: {', '.join(map(str, unmapped))}")
+    return warnings
+
+
+def prepare_rendiconto(df):
+    """Order the cash-flow sheet by its first (sort key) column, then drop it."""
+    df = df.fillna(0)
+    if df.shape[1] > 1:
+        prima_colonna = df.columns[0]
+        df[prima_colonna] = pd.to_numeric(df[prima_colonna], errors="coerce")
+        df = df.sort_values(by=prima_colonna).drop(columns=[prima_colonna])
+    return df
+
+
+class DynamicWorkbook:
+    """Everything the three pages show, parsed and derived once from the uploaded files.
+
+    conto, stato_patrimoniale and rendiconto are display-ready frames (None when the sheet
+    is missing), mapped is the Conto Economico joined with its Tipo, cube compares its
+    periods on demand and warnings lists problems found in the mappings.
+    """
+
+    def __init__(self, ce_bytes, mappings_bytes, output_bytes=None, engine=None):
+        sheets = read_sheets(
+            ce_bytes, [SHEET_CONTO, SHEET_STATO, SHEET_RENDICONTO], "Conto economico", [SHEET_CONTO], engine
+        )
+        mappings = read_sheets(mappings_bytes, [SHEET_MAPPINGS], "Mappings", [SHEET_MAPPINGS], engine)[SHEET_MAPPINGS]
+
+        self.conto = sheets[SHEET_CONTO].fillna(0)
+        self.warnings = check_mappings(self.conto, mappings)
+        self.mappings = mappings[["Voce", "Tipo"]]
+
+        mapped = pd.merge(self.conto, self.mappings, on="Voce", how="left")
+        self.mapped = mapped.drop_duplicates(subset=["Voce"], keep="first")
+
+        self.periodi = [col for col in self.conto.columns[1:] if pd.api.types.is_numeric_dtype(self.conto[col])]
+        self.cube = VarianceCube(conto_economico(self.mapped, self.periodi))
+
+        stato, rendiconto = sheets[SHEET_STATO], sheets[SHEET_RENDICONTO]
+        self.stato_patrimoniale = stato.fillna(0) if stato is not None else None
+        self.rendiconto = prepare_rendiconto(rendiconto) if rendiconto is not None else None
+
+        # Placeholder: you can use this for future features
+        self.output_design = None
+        if output_bytes is not None:
+            with pd.ExcelFile(io.BytesIO(output_bytes), engine=engine) as xls:
+                self.output_design = xls.parse(0)
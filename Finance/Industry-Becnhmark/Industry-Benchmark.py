@@ -2,9 +2,15 @@ import streamlit as st
 import pandas as pd
 import yfinance as yf
 import os
+import sys
 import matplotlib.pyplot as plt
-from groq import Groq
 from dotenv import load_dotenv
+from fundamentals import FundamentalsFetcher
+from statement_store import StatementStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.llm import get_llm, chat_messages
+from shared.export import export_frames, available_formats
 
 # **🔒 Load API Key Securely**
 load_dotenv()
@@ -14,6 +20,18 @@ if not GROQ_API_KEY:
     st.error("🚨 API Key is missing! Set it in Streamlit Secrets or a .env file.")
     st.stop()
 
+# **⚡ Shared fetcher: concurrent requests, retries and a 1h TTL cache across reruns,
+# backed by a local Parquet store so later sessions only fetch periods that are missing**
+@st.cache_resource
+def get_fetcher():
+    return FundamentalsFetcher(max_workers=8, ttl=3600, store=StatementStore())
+
+def display_statement(data, data_type, error=None):
+    """Keep the placeholder frames the app has always shown for missing or failed data."""
+    if data is None:
+        return pd.DataFrame({f"Error fetching {data_type}": [error]})
+    return data if not data.empty else pd.DataFrame({f"No {data_type} data": []})
+
 # **📊 Streamlit UI**
 st.set_page_config(page_title="AI Financial Benchmarking Tool", page_icon="📈", layout="wide")
 st.title("📊 AI Financial Benchmarking Tool")
@@ -30,21 +48,15 @@ if analysis_type == "Single Company Analysis":
             st.write(f"🔄 Fetching data for {ticker}...")
             company = yf.Ticker(ticker)
 
-            # Function to safely fetch data
-            def get_financial_data(data_type):
-                try:
-                    data = getattr(company, data_type)
-                    if data is not None and not data.empty:
-                        return data.T  # Transpose for better readability
-                    else:
-                        return pd.DataFrame({f"No {data_type} data": []})
-                except Exception as e:
-                    return pd.DataFrame({f"Error fetching {data_type}": [str(e)]})
-
-            # Fetch financials
-            financials = get_financial_data("quarterly_financials")
-            balance_sheet = get_financial_data("quarterly_balance_sheet")
-            cashflow = get_financial_data("quarterly_cashflow")
+            # Fetch financials concurrently (transposed for better readability);
+            # a statement that fails shows its error while the others are still displayed
+            statements, errors = get_fetcher().fetch_many(
+                [ticker], ["financials", "balance_sheet", "cashflow"], keep_partial=True
+            )
+            fetched, error = statements.get(ticker, {}), errors.get(ticker)
+            financials = display_statement(fetched.get("financials"), "quarterly_financials", error)
+            balance_sheet = display_statement(fetched.get("balance_sheet"), "quarterly_balance_sheet", error)
+            cashflow = display_statement(fetched.get("cashflow"), "quarterly_cashflow", error)
 
             # Display Data
             st.subheader(f"📜 {ticker} - Financial Statements")
@@ -57,19 +69,19 @@ if analysis_type == "Single Company Analysis":
             st.write("💰 **Cash Flow Statement**")
             st.dataframe(cashflow)
 
-            # Save to Excel
-            excel_filename = f"{ticker}_financials.xlsx"
-            with pd.ExcelWriter(excel_filename) as writer:
-                financials.to_excel(writer, sheet_name="Financials")
-                balance_sheet.to_excel(writer, sheet_name="Balance Sheet")
-                cashflow.to_excel(writer, sheet_name="Cash Flow")
-
-            st.download_button(
-                label="📥 Download Financial Data (Excel)",
-                data=open(excel_filename, "rb").read(),
-                file_name=excel_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            # Export built in memory, only when requested, and reused for unchanged data
+            export_format = st.selectbox("Export format", available_formats(), key="single_export_format")
+            if st.checkbox("Prepare download", key="single_export"):
+                export = export_frames(
+                    {"Financials": financials, "Balance Sheet": balance_sheet, "Cash Flow": cashflow},
+                    export_format, stem=f"{ticker}_financials",
+                )
+                st.download_button(
+                    label=f"📥 Download Financial Data ({export_format})",
+                    data=export.data,
+                    file_name=export.file_name,
+                    mime=export.mime
+                )
 
             # **🔍 AI Analysis**
             st.subheader("🧠 AI-Powered Industry & Company Analysis")
@@ -88,19 +100,9 @@ if analysis_type == "Single Company Analysis":
             - Industry: {company.info.get('industry', 'N/A')}
             """
 
-            # Call Groq API for AI-generated insights
-            client = Groq(api_key=GROQ_API_KEY)
-            response = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a financial expert providing stock analysis."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama3-8b-8192",
-            )
-
-            # Display AI response
-            ai_commentary = response.choices[0].message.content
-            st.write(ai_commentary)
+            # Call Groq API for AI-generated insights, streamed into the page
+            llm = get_llm(GROQ_API_KEY)
+            st.write_stream(llm.stream(chat_messages("You are a financial expert providing stock analysis.", prompt)))
 
         except Exception as e:
             st.error(f"⚠️ Error fetching data: {str(e)}")
@@ -110,32 +112,14 @@ elif analysis_type == "Multi-Company Comparison":
     tickers = st.text_input("Enter multiple company ticker symbols (comma-separated, e.g., AAPL, MSFT, TSLA):")
 
     if tickers:
-        ticker_list = [ticker.strip().upper() for ticker in tickers.split(",")]
-        all_data = {}
-
-        for ticker in ticker_list:
-            try:
-                st.write(f"🔄 Fetching data for {ticker}...")
-                company = yf.Ticker(ticker)
-
-                # Fetch financials safely
-                def get_financial_data(data_type):
-                    try:
-                        data = getattr(company, data_type)
-                        if data is not None and not data.empty:
-                            return data.T  # Transpose for better readability
-                        else:
-                            return pd.DataFrame({f"No {data_type} data": []})
-                    except Exception as e:
-                        return pd.DataFrame({f"Error fetching {data_type}": [str(e)]})
-
-                # Store data
-                all_data[ticker] = {
-                    "financials": get_financial_data("quarterly_financials"),
-                }
-
-            except Exception as e:
-                st.error(f"⚠️ Error fetching data for {ticker}: {str(e)}")
+        ticker_list = [ticker.strip().upper() for ticker in tickers.split(",") if ticker.strip()]
+
+        # Fetch all tickers concurrently through the shared, cached fetcher
+        with st.spinner(f"🔄 Fetching data for {len(ticker_list)} companies..."):
+            all_data, errors = get_fetcher().fetch_many(ticker_list, ["financials"])
+
+        for ticker, error in errors.items():
+            st.error(f"⚠️ Error fetching data for {ticker}: {error}")
 
         # **📈 Multi-Company Graph Selection**
         st.subheader("📊 Compare Metrics Across Companies")
@@ -166,16 +150,17 @@ elif analysis_type == "Multi-Company Comparison":
             # Show graph
             st.pyplot(fig)
 
-        # **📥 Download All Data as Excel**
+        # **📥 Download All Data**
         if all_data:
-            excel_filename = "financial_data_comparison.xlsx"
-            with pd.ExcelWriter(excel_filename) as writer:
-                for ticker in all_data:
-                    all_data[ticker]["financials"].to_excel(writer, sheet_name=f"{ticker}_Financials")
-
-            st.download_button(
-                label="📥 Download All Financial Data (Excel)",
-                data=open(excel_filename, "rb").read(),
-                file_name=excel_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            export_format = st.selectbox("Export format", available_formats(), key="multi_export_format")
+            if st.checkbox("Prepare download", key="multi_export"):
+                export = export_frames(
+                    {f"{ticker}_Financials": all_data[ticker]["financials"] for ticker in all_data},
+                    export_format, stem="financial_data_comparison",
+                )
+                st.download_button(
+                    label=f"📥 Download All Financial Data ({export_format})",
+                    data=export.data,
+                    file_name=export.file_name,
+                    mime=export.mime
+                )
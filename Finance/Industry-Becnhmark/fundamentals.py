@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+STATEMENTS = ["financials", "balance_sheet", "cashflow"]
+
+
+def statement_attribute(statement, period="quarterly"):
+    """yfinance attribute name, e.g. ("financials", "quarterly") -> "quarterly_financials"."""
+    return f"quarterly_{statement}" if period == "quarterly" else statement
+
+
+class YFinanceSource:
+    """Fetches raw statements from Yahoo Finance through yfinance."""
+
+    def fetch(self, ticker, statement, period="quarterly"):
+        import yfinance as yf
+
+        return getattr(yf.Ticker(ticker), statement_attribute(statement, period))
+
+
+class StaticSource:
+    """Offline source serving pre-built frames keyed by (ticker, statement, period)."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = 0
+
+    def fetch(self, ticker, statement, period="quarterly"):
+        self.calls += 1
+        try:
+            return self.frames[(ticker, statement, period)]
+        except KeyError:
+            raise LookupError(f"No {period} {statement} for {ticker}") from None
+
+
+class TTLCache:
+    """Thread-safe dictionary whose entries expire ttl seconds after being stored."""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FundamentalsFetcher:
+    """Pulls statements for many tickers through a bounded thread pool with retries and a TTL cache."""
+
+    def __init__(self, source=None, max_workers=8, retries=3, backoff=0.5, ttl=3600, store=None):
+        self.source = source or YFinanceSource()
+        self.store = store
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = TTLCache(ttl)
+
+    def _fetch_source(self, ticker, statement, period):
+        for attempt in range(self.retries):
+            try:
+                return self.source.fetch(ticker, statement, period)
+            except LookupError:
+                raise
+            except Exception:
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def fetch(self, ticker, statement, period="quarterly"):
+        """Return the statement transposed to one row per reporting date (empty if unavailable).
+
+        With a StatementStore attached, the source is only queried when the store may be
+        missing a newer period, and fetched rows are merged into the stored history.
+        """
+        key = (ticker, statement, period)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.store is not None and not self.store.needs_refresh(ticker, statement, period):
+            data = self.store.read(ticker, statement, period)
+            data = data if data is not None else pd.DataFrame()
+        else:
+            data = self._fetch_source(ticker, statement, period)
+            data = data.T if data is not None and not data.empty else pd.DataFrame()
+            if self.store is not None:
+                data = self.store.write(ticker, statement, period, data)
+
+        self.cache.set(key, data)
+        return data
+
+    def fetch_many(self, tickers, statements=("financials",), period="quarterly", keep_partial=False):
+        """Fetch every (ticker, statement) pair concurrently.
+
+        Returns (data, errors): data maps ticker -> statement -> frame and errors maps
+        ticker -> "statement: message" for tickers where any statement failed. Such tickers
+        are dropped from data unless keep_partial is set, which keeps their other statements.
+        """
+        data, failures = {}, {}
+        jobs = [(ticker, statement) for ticker in dict.fromkeys(tickers) for statement in statements]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch, ticker, statement, period): (ticker, statement) for ticker, statement in jobs}
+            for future, (ticker, statement) in futures.items():
+                try:
+                    data.setdefault(ticker, {})[statement] = future.result()
+                except Exception as e:
+                    failures.setdefault(ticker, []).append(f"{statement}: {e}")
+
+        errors = {ticker: "; ".join(messages) for ticker, messages in failures.items()}
+        if not keep_partial:
+            for ticker in errors:
+                data.pop(ticker, None)
+        return data, errors
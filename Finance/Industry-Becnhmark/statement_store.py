@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.disk_cache import write_atomic
+
+DEFAULT_STORE_DIR = os.getenv(
+    "STATEMENT_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "statements")
+)
+
+# Companies usually publish a period's statements within this many days of its end
+REPORTING_LAG = timedelta(days=45)
+PERIOD_LENGTH = {"quarterly": pd.DateOffset(months=3), "annual": pd.DateOffset(years=1)}
+
+
+class StatementStore:
+    """Local Parquet warehouse of fetched statements, one file per (ticker, statement, period).
+
+    Files live under <root>/<ticker>/<period>_<statement>.parquet with one row per
+    reporting date; manifest.json records what each file holds and when it was last checked.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, recheck_after=timedelta(days=1)):
+        self.root = root
+        self.recheck_after = recheck_after
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, key, entry):
+        # Other processes share the file: merge into what is on disk now rather than our older copy
+        manifest = self._load_manifest()
+        manifest[key] = entry
+        write_atomic(self._manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+        self.manifest = manifest
+
+    @staticmethod
+    def _key(ticker, statement, period):
+        return f"{ticker}/{period}_{statement}"
+
+    def _path(self, ticker, statement, period):
+        return os.path.join(self.root, ticker, f"{period}_{statement}.parquet")
+
+    def read(self, ticker, statement, period="quarterly"):
+        """Stored rows for the statement, newest first, or None if nothing is stored."""
+        path = self._path(ticker, statement, period)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def write(self, ticker, statement, period, frame, now=None):
+        """Merge freshly fetched rows into the stored history and return the merged frame.
+
+        Rows for reporting dates already on disk are replaced by the new values.
+        """
+        now = now or datetime.now()
+        frame = frame.copy()
+        frame.index = pd.to_datetime(frame.index)
+        frame.columns = frame.columns.astype(str)
+        frame = frame.apply(pd.to_numeric, errors="coerce")
+
+        with self._lock:
+            stored = self.read(ticker, statement, period)
+            if stored is not None and not stored.empty:
+                frame = pd.concat([frame, stored[~stored.index.isin(frame.index)]])
+            frame = frame.sort_index(ascending=False)
+
+            if not frame.empty:
+                path = self._path(ticker, statement, period)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_atomic(path, frame.to_parquet())
+
+            self._save_manifest(self._key(ticker, statement, period), {
+                "rows": len(frame),
+                "latest": frame.index.max().strftime("%Y-%m-%d") if not frame.empty else None,
+                "earliest": frame.index.min().strftime("%Y-%m-%d") if not frame.empty else None,
+                "checked_at": now.isoformat(timespec="seconds"),
+            })
+        return frame
+
+    def needs_refresh(self, ticker, statement, period="quarterly", now=None):
+        """True when a newer period than the latest stored one could have been published.
+
+        Also true when nothing is stored. Otherwise the source is only asked again once the
+        last check is older than recheck_after and the next period's reporting lag has passed.
+        """
+        now = now or datetime.now()
+        entry = self.manifest.get(self._key(ticker, statement, period))
+        if entry is None:
+            return True
+        if now - datetime.fromisoformat(entry["checked_at"]) < self.recheck_after:
+            return False
+        if entry["latest"] is None:
+            return True
+        next_due = pd.Timestamp(entry["latest"]) + PERIOD_LENGTH[period] + REPORTING_LAG
+        return pd.Timestamp(now) >= next_due
+
+    def tickers(self):
+        return sorted({key.split("/", 1)[0] for key in self.manifest})
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-from fbprophet import Prophet
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.export import export_frames, available_formats
+from shared.baselines import ENGINE_NAMES, get_engine, infer_offset, horizon_steps, forecast_series, prepare_long_frame
+
 # Load API Key (Optional for Future Enhancements)
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -30,29 +33,93 @@ if uploaded_file:
     # Select the Column to Forecast
     forecast_col = st.selectbox("Select the Column to Forecast", [col for col in df.columns if col != date_col])
 
+    # Forecast Engine: Prophet or a vectorized NumPy baseline for fast screening
+    engine_name = st.selectbox("Select the Forecast Engine", ENGINE_NAMES)
+
+    # Batch Mode: one model per series in a long-format sheet
+    batch_mode = st.checkbox("Batch mode (one forecast per series)")
+    if batch_mode:
+        id_col = st.selectbox("Select the Series ID Column", [col for col in df.columns if col not in (date_col, forecast_col)])
+        long_df = prepare_long_frame(df, id_col=id_col, date_col=date_col, value_col=forecast_col)
+        n_series = long_df["series_id"].nunique()
+
+        if st.button(f"Forecast {n_series} series"):
+            prophet_options = {}
+            if engine_name == "Prophet":
+                progress = st.progress(0.0)
+
+                def report(done, total, result):
+                    if result.error:
+                        st.warning(f"{result.series_id}: {result.error}")
+                    progress.progress(done / total)
+
+                prophet_options = {"on_result": report}
+            offset = infer_offset(long_df["ds"])
+            engine = get_engine(engine_name, **prophet_options)
+            batch_forecast = engine.forecast_long(long_df, horizon_steps(offset, 30), offset)
+            st.write("### Batch Forecast Results")
+            st.dataframe(batch_forecast)
+            st.download_button(label="📥 Download Batch Forecast (CSV)", data=batch_forecast.to_csv(index=False),
+                               file_name="batch_forecast.csv", mime="text/csv")
+        st.stop()
+
     # Prepare Data for Prophet
-    data = df[[date_col, forecast_col]].rename(columns={date_col: "ds", forecast_col: "y"})
+    data = df[[date_col, forecast_col]].rename(columns={date_col: "ds", forecast_col: "y"}).dropna()
 
-    # Forecasting with Prophet
-    st.write("### Forecasting in Progress...")
-    model = Prophet()
-    model.fit(data)
-    
-    future = model.make_future_dataframe(periods=30)
-    forecast = model.predict(future)
+    if engine_name == "Prophet":
+        from shared.prophet_cache import Prophet, fingerprint
+        from shared.backtest import run_backtest, count_folds, summarize_backtest, best_params
+
+        # Backtest the default grid over rolling origins and use the best configuration
+        tuned = st.session_state.setdefault("tuned_params", {})
+        data_key = fingerprint(data)
+        with st.expander("🧪 Backtest & tune hyperparameters"):
+            n_folds = st.slider("Folds", 1, 10, 3)
+            holdout = max(min(30, len(data) // 4), 1)
+            total = count_folds(len(data), horizon=holdout, n_folds=n_folds)
+            if st.button(f"Run backtest ({total} fits)", disabled=not total):
+                progress = st.progress(0.0)
+                results = []
+                for i, result in enumerate(run_backtest(data, horizon=holdout, n_folds=n_folds), start=1):
+                    results.append(result)
+                    progress.progress(i / total)
+                summary = summarize_backtest(results)
+                st.dataframe(summary.drop(columns=["params"]))
+                tuned[data_key] = best_params(summary)
+            if tuned.get(data_key):
+                st.success(f"Forecast uses the best configuration: {tuned[data_key]}")
 
-    # Plot Forecast
-    st.write("### Forecast Results")
-    fig1 = model.plot(forecast)
-    st.pyplot(fig1)
+        # Forecasting with Prophet
+        st.write("### Forecasting in Progress...")
+        model = Prophet(**tuned.get(data_key, {}))
+        model.fit(data)
     
-    # Download Forecast Results
+        future = model.make_future_dataframe(periods=30)
+        forecast = model.predict(future)
+
+        # Plot Forecast
+        st.write("### Forecast Results")
+        fig1 = model.plot(forecast)
+        st.pyplot(fig1)
+    else:
+        # Baseline at the data's own frequency, covering the same 30 days
+        offset = infer_offset(data["ds"])
+        forecast = forecast_series(data, get_engine(engine_name), horizon_steps(offset, 30), offset)
+
+        st.write("### Forecast Results")
+        fig1, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(data["ds"], data["y"], "k.", label="Actual")
+        ax.plot(forecast["ds"], forecast["yhat"], label=f"{engine_name} forecast")
+        ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"], alpha=0.2)
+        ax.legend()
+        st.pyplot(fig1)
+
+    # Download Forecast Results (built in memory when requested)
     forecast_download = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
     forecast_download.columns = ["Date", "Forecast", "Lower Bound", "Upper Bound"]
-    forecast_file = "forecast_results.xlsx"
-    forecast_download.to_excel(forecast_file, index=False)
-    
-    with open(forecast_file, "rb") as file:
-        st.download_button(label="📥 Download Forecast Results", data=file, file_name=forecast_file, mime="application/vnd.ms-excel")
+    export_format = st.selectbox("Export format", available_formats())
+    if st.checkbox("Prepare download"):
+        export = export_frames({"Forecast": forecast_download}, export_format, stem="forecast_results", index=False)
+        st.download_button(label="📥 Download Forecast Results", data=export.data, file_name=export.file_name, mime=export.mime)
 
     st.success("🎉 Forecasting Complete! Download your results above.")
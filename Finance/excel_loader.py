@@ -0,0 +1,44 @@
+import hashlib
+import importlib.util
+import io
+
+import pandas as pd
+
+
+def file_hash(data):
+    """Content hash used to key everything derived from an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def preferred_engine():
+    """Use the Rust-based calamine reader when it is installed, otherwise pandas' default."""
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return None
+
+
+def list_sheets(data, engine=None):
+    """Sheet names only; the workbook index is read without parsing any sheet."""
+    with pd.ExcelFile(io.BytesIO(data), engine=engine) as xls:
+        return list(xls.sheet_names)
+
+
+def load_sheet(data, sheet_name, engine=None):
+    """Parse a single sheet of the workbook."""
+    return pd.read_excel(io.BytesIO(data), sheet_name=sheet_name, engine=engine)
+
+
+def sheet_schema(data, sheet_name, engine=None, sample_rows=50):
+    """Column -> dtype mapping inferred from the first rows of a sheet."""
+    head = pd.read_excel(io.BytesIO(data), sheet_name=sheet_name, engine=engine, nrows=sample_rows)
+    return {str(column): str(dtype) for column, dtype in head.dtypes.items()}
+
+
+def page_count(df, page_size):
+    return max(1, -(-len(df) // page_size))
+
+
+def page_slice(df, page, page_size):
+    """Rows of the given 1-based page."""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+
+class NumericProfile:
+    """Running count, moments, extremes and a bottom-k sample for approximate quantiles."""
+
+    kind = "numeric"
+
+    def __init__(self, sample_size=2048, seed=0):
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self._sample = np.empty(0)
+        self._priority = np.empty(0)
+
+    def update(self, values):
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        finite = values[~np.isnan(values)]
+        self.nulls += len(values) - len(finite)
+        n = len(finite)
+        if not n:
+            return
+
+        # Chan et al. pairwise update of mean and sum of squared deviations
+        chunk_mean = finite.mean()
+        chunk_m2 = ((finite - chunk_mean) ** 2).sum()
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, finite.min())
+        self.max = max(self.max, finite.max())
+
+        # Keeping the k smallest random priorities is a uniform sample of everything seen so far
+        sample = np.concatenate([self._sample, finite])
+        priority = np.concatenate([self._priority, self._rng.random(n)])
+        if len(sample) > self.sample_size:
+            keep = np.argpartition(priority, self.sample_size)[:self.sample_size]
+            sample, priority = sample[keep], priority[keep]
+        self._sample, self._priority = sample, priority
+
+    def quantiles(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        if not len(self._sample):
+            return {}
+        return dict(zip(qs, np.quantile(self._sample, qs)))
+
+    def summary(self, digits=4):
+        if not self.count:
+            return {"type": self.kind, "nulls": self.nulls}
+        std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+        result = {
+            "type": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "mean": round(self.mean, digits),
+            "std": round(std, digits),
+            "min": round(float(self.min), digits),
+            "max": round(float(self.max), digits),
+            "sum": round(self.mean * self.count, digits),
+        }
+        for q, value in self.quantiles().items():
+            result[f"p{int(q * 100)}"] = round(float(value), digits)
+        return result
+
+
+class CategoricalProfile:
+    """Null count and approximate top-k values, pruning rare values so memory stays bounded."""
+
+    kind = "categorical"
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.count = 0
+        self.nulls = 0
+        self.counts = {}
+
+    def update(self, values):
+        nulls = values.isna()
+        self.nulls += int(nulls.sum())
+        present = values[~nulls].astype(str)
+        self.count += len(present)
+        for value, n in present.value_counts().items():
+            self.counts[value] = self.counts.get(value, 0) + int(n)
+        if len(self.counts) > self.capacity:
+            # Keep only the heaviest values; counts of survivors stay exact lower bounds
+            top = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:self.capacity]
+            self.counts = dict(top)
+
+    def summary(self, top_k=5):
+        top = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return {
+            "type": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct_seen": len(self.counts) if len(self.counts) < self.capacity else f">={self.capacity}",
+            "top": dict(top),
+        }
+
+
+class DatetimeProfile:
+    """Null count and date range."""
+
+    kind = "datetime"
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        values = pd.to_datetime(values, errors="coerce")
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        self.count += len(present)
+        if len(present):
+            lo, hi = present.min(), present.max()
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+
+    def summary(self):
+        return {
+            "type": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "min": str(self.min.date()) if self.min is not None else None,
+            "max": str(self.max.date()) if self.max is not None else None,
+        }
+
+
+def _profile_for(series):
+    if pd.api.types.is_bool_dtype(series):
+        return CategoricalProfile()
+    if pd.api.types.is_numeric_dtype(series):
+        return NumericProfile()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DatetimeProfile()
+    return CategoricalProfile()
+
+
+def profile_frame(df, chunk_size=50_000):
+    """Profile every column in one pass over row chunks; returns a dict with row count and column summaries."""
+    profiles = {column: _profile_for(df[column]) for column in df.columns}
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        for column, profile in profiles.items():
+            profile.update(chunk[column])
+    return {
+        "num_rows": len(df),
+        "num_columns": len(df.columns),
+        "columns": {str(column): profile.summary() for column, profile in profiles.items()},
+    }
+
+
+def _column_line(name, stats):
+    details = ", ".join(f"{key}={value}" for key, value in stats.items() if key != "type")
+    return f"- {name} ({stats['type']}): {details}"
+
+
+def summarize_profile(profile, max_tokens=1500):
+    """Render a profile as compact text of at most roughly max_tokens tokens (~4 characters each).
+
+    Detail is dropped progressively: first the top values and quantiles, then whole columns.
+    """
+    budget = max_tokens * 4
+    header = f"Rows: {profile['num_rows']}, Columns: {profile['num_columns']}"
+    columns = profile["columns"]
+
+    def render(strip_detail):
+        lines = []
+        for name, stats in columns.items():
+            if strip_detail:
+                stats = {k: v for k, v in stats.items() if k != "top" and not (k[0] == "p" and k[1:].isdigit())}
+            lines.append(_column_line(name, stats))
+        return lines
+
+    for strip_detail in (False, True):
+        lines = render(strip_detail)
+        text = "\n".join([header] + lines)
+        if len(text) <= budget:
+            return text
+
+    kept, used = [], len(header)
+    for line in lines:
+        if used + len(line) + 1 > budget - 40:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    kept.append(f"... {len(lines) - len(kept)} more columns omitted")
+    return "\n".join([header] + kept)
@@ -0,0 +1,269 @@
+import json
+import re
+
+import pandas as pd
+
+FILTER_OPS = ["==", "!=", ">", ">=", "<", "<=", "in", "between", "contains"]
+AGG_FUNCS = ["sum", "mean", "median", "min", "max", "count", "nunique"]
+DATE_PARTS = ["year", "quarter", "month", "week", "day"]
+
+QUERY_FORMAT = """{
+  "sheet": "<sheet to query>",
+  "join": {"sheet": "<other sheet>", "on": ["<key column>"], "how": "left|inner"} or null,
+  "derive": [{"column": "<date column>", "part": "year|quarter|month|week|day", "as": "<new column>"}],
+  "filters": [{"column": "<column>", "op": "==|!=|>|>=|<|<=|in|between|contains", "value": <value or [low, high] or list>}],
+  "group_by": ["<column>"],
+  "aggregations": [{"column": "<column>", "func": "sum|mean|median|min|max|count|nunique", "as": "<result name>"}],
+  "order_by": [{"column": "<column>", "descending": true}],
+  "limit": 20
+}"""
+
+
+class QueryError(ValueError):
+    """The structured query is malformed or refers to unknown sheets or columns."""
+
+
+def schema_text(schemas):
+    """Describe sheets as 'Sheet: col (dtype), ...' lines for the planning prompt."""
+    lines = []
+    for sheet, dtypes in schemas.items():
+        columns = ", ".join(f"{column} ({dtype})" for column, dtype in dtypes.items())
+        lines.append(f"- {sheet}: {columns}")
+    return "\n".join(lines)
+
+
+def query_prompt(question, schemas):
+    return f"""
+    You translate questions about an Excel workbook into a JSON query. The workbook has these sheets and columns:
+    {schema_text(schemas)}
+
+    Reply with a single JSON object and nothing else, using this format (omit keys you do not need):
+    {QUERY_FORMAT}
+
+    Question: {question}
+    """
+
+
+def parse_query(text):
+    """Pull the first JSON object out of an LLM reply."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise QueryError("The reply did not contain a JSON query.")
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise QueryError(f"The query is not valid JSON: {e}") from None
+
+
+def _require_columns(df, columns, where):
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise QueryError(f"Unknown column(s) in {where}: {', '.join(map(str, missing))}")
+
+
+def _as_list(value):
+    """A single value as a one-item list; lists pass through and missing values give []."""
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _specs(query, key, shorthand=None):
+    """The list of dict specs under key; a bare string becomes {shorthand: value} when allowed."""
+    specs = []
+    for spec in _as_list(query.get(key)):
+        if isinstance(spec, str) and shorthand:
+            spec = {shorthand: spec}
+        if not isinstance(spec, dict):
+            raise QueryError(f"Each entry of '{key}' must be an object, got {spec!r}")
+        specs.append(spec)
+    return specs
+
+
+def _sheet_name(value, where):
+    if not isinstance(value, str) or not value:
+        raise QueryError(f"{where} must name a sheet, got {value!r}")
+    return value
+
+
+def _column_name(value, where):
+    # Headers read from Excel may be numbers; lists, objects and booleans are never column names
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)) or value == "":
+        raise QueryError(f"Column names in '{where}' must be single names, got {value!r}")
+    return value
+
+
+def _columns(values, where):
+    return [_column_name(value, where) for value in _as_list(values)]
+
+
+def normalize_query(query, max_rows=50):
+    """Check the shape of an LLM-written query and coerce the forgiving cases before running it."""
+    if not isinstance(query, dict):
+        raise QueryError("The query must be a JSON object.")
+    _sheet_name(query.get("sheet"), "The query")
+    join = query.get("join")
+    if join is not None and not isinstance(join, dict):
+        raise QueryError(f"'join' must be an object, got {join!r}")
+    if join:
+        _sheet_name(join.get("sheet"), "'join'")
+
+    limit = query.get("limit")
+    try:
+        limit = max_rows if limit in (None, "") else int(limit)
+    except (TypeError, ValueError):
+        raise QueryError(f"'limit' must be a number, got {limit!r}") from None
+
+    normalized = {
+        **query,
+        "join": {**join, "on": _columns(join.get("on"), "join")} if join else None,
+        "derive": _specs(query, "derive"),
+        "filters": _specs(query, "filters"),
+        "group_by": _columns(query.get("group_by"), "group_by"),
+        "aggregations": _specs(query, "aggregations"),
+        "order_by": _specs(query, "order_by", shorthand="column"),
+        "limit": max(min(limit, max_rows), 0),
+    }
+    for key in ("derive", "filters", "aggregations", "order_by"):
+        for spec in normalized[key]:
+            _column_name(spec.get("column"), key)
+            if spec.get("as") is not None:
+                _column_name(spec["as"], key)
+    return normalized
+
+
+def _to_datetime(value, column):
+    try:
+        return pd.to_datetime(value) if not isinstance(value, list) else [pd.to_datetime(v) for v in value]
+    except (ValueError, TypeError, OverflowError):
+        raise QueryError(f"Cannot read {value!r} as a date for {column}") from None
+
+
+def _apply_filter(df, spec):
+    column, op, value = spec.get("column"), spec.get("op"), spec.get("value")
+    _require_columns(df, [column], "filters")
+    if op not in FILTER_OPS:
+        raise QueryError(f"Unsupported filter operator: {op}")
+
+    series = df[column]
+    if pd.api.types.is_datetime64_any_dtype(series) and op != "contains":
+        value = _to_datetime(value, column)
+
+    try:
+        mask = _mask(series, op, value)
+    except (TypeError, ValueError) as e:
+        raise QueryError(f"Cannot compare {column} with {value!r}: {e}") from None
+    return df[mask]
+
+
+def _mask(series, op, value):
+    if op == "==":
+        mask = series == value
+    elif op == "!=":
+        mask = series != value
+    elif op == ">":
+        mask = series > value
+    elif op == ">=":
+        mask = series >= value
+    elif op == "<":
+        mask = series < value
+    elif op == "<=":
+        mask = series <= value
+    elif op == "in":
+        mask = series.isin(value if isinstance(value, list) else [value])
+    elif op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise QueryError("'between' needs a [low, high] value.")
+        mask = series.between(value[0], value[1])
+    else:
+        mask = series.astype(str).str.contains(str(value), case=False, na=False, regex=False)
+    return mask
+
+
+def run_query(query, load_sheet, max_rows=50):
+    """Execute a structured query with vectorized pandas operations.
+
+    load_sheet(name) returns the DataFrame for a sheet, so only sheets the query touches are loaded.
+    Returns the result frame truncated to max_rows (or the query's smaller limit).
+    Every problem with the query, including type errors while running it, raises QueryError.
+    """
+    query = normalize_query(query, max_rows)
+    try:
+        return _execute(query, load_sheet)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise QueryError(f"Cannot run the query: {type(e).__name__}: {e}") from None
+
+
+def _execute(query, load_sheet):
+    try:
+        df = load_sheet(query["sheet"])
+    except (KeyError, ValueError):
+        raise QueryError(f"Unknown sheet: {query['sheet']}") from None
+
+    join = query.get("join")
+    if join:
+        on = join["on"]
+        try:
+            other = load_sheet(join["sheet"])
+        except (KeyError, ValueError):
+            raise QueryError(f"Unknown sheet: {join['sheet']}") from None
+        _require_columns(df, on, "join")
+        _require_columns(other, on, "join")
+        how = join.get("how", "left")
+        if how not in ("left", "inner"):
+            raise QueryError(f"Unsupported join type: {how}")
+        df = df.merge(other, on=on, how=how, suffixes=("", f"_{join['sheet']}"))
+
+    for spec in query["derive"]:
+        column, part = spec.get("column"), spec.get("part")
+        _require_columns(df, [column], "derive")
+        if part not in DATE_PARTS:
+            raise QueryError(f"Unsupported date part: {part}")
+        dates = pd.to_datetime(df[column], errors="coerce")
+        values = dates.dt.isocalendar().week if part == "week" else getattr(dates.dt, part)
+        df = df.assign(**{spec.get("as") or f"{column}_{part}": values})
+
+    for spec in query["filters"]:
+        df = _apply_filter(df, spec)
+
+    group_by = query["group_by"]
+    aggregations = query["aggregations"]
+    _require_columns(df, group_by, "group_by")
+    if aggregations:
+        named = {}
+        for spec in aggregations:
+            column, func = spec.get("column"), spec.get("func")
+            _require_columns(df, [column], "aggregations")
+            if func not in AGG_FUNCS:
+                raise QueryError(f"Unsupported aggregation: {func}")
+            named[spec.get("as") or f"{func}_{column}"] = pd.NamedAgg(column=column, aggfunc=func)
+        try:
+            if group_by:
+                df = df.groupby(group_by, dropna=False).agg(**named).reset_index()
+            else:
+                df = pd.DataFrame({name: [df[agg.column].agg(agg.aggfunc)] for name, agg in named.items()})
+        except (TypeError, ValueError) as e:
+            raise QueryError(f"Cannot aggregate: {e}") from None
+    elif group_by:
+        df = df[group_by].drop_duplicates()
+
+    order_by = query["order_by"]
+    if order_by:
+        columns = [spec.get("column") for spec in order_by]
+        _require_columns(df, columns, "order_by")
+        df = df.sort_values(columns, ascending=[not spec.get("descending", False) for spec in order_by])
+
+    return df.head(query["limit"]).reset_index(drop=True)
+
+
+def answer_prompt(question, query, result):
+    return f"""
+    You are an AI data analyst. The question below was answered by running this query on the workbook:
+    {json.dumps(query)}
+
+    Query result (CSV, {len(result)} rows):
+    {result.to_csv(index=False)}
+
+    Using only these computed results, answer the question:
+    {question}
+    """
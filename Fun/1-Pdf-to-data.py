@@ -2,16 +2,25 @@ import streamlit as st
 import pdfplumber
 import pandas as pd
 import io
+import os
+import tempfile
+from pdf_extract import PageTableCache, extract_page_tables, stream_tables_to_excel, DEFAULT_CACHE_DIR
 
-# Function to extract tables from PDF
+# Function to extract tables from PDF (pages seen before are served from the on-disk cache)
 def extract_tables_from_pdf(pdf_file):
     all_tables = []
+    cached_pages = 0
+    cache = PageTableCache()
     with pdfplumber.open(pdf_file) as pdf:
         for page in pdf.pages:
-            tables = page.extract_tables()
+            tables, hit = extract_page_tables(page, cache)
+            cached_pages += hit
             for table in tables:
                 df = pd.DataFrame(table)
                 all_tables.append(df)
+        if cached_pages:
+            st.write(f"♻️ Reused {cached_pages} of {len(pdf.pages)} unchanged pages from cache.")
+    cache.evict()
     return all_tables
 
 # Function to save tables to an Excel file
@@ -30,7 +39,36 @@ st.write("Upload a PDF file, and the app will extract tabular data and convert i
 
 uploaded_file = st.file_uploader("Upload a PDF", type="pdf")
 
-if uploaded_file is not None:
+large_pdf_mode = st.checkbox("Large PDF mode (parallel pages, streamed to Excel)")
+
+if uploaded_file is not None and large_pdf_mode:
+    # Workers open the PDF themselves, so hand them a file on disk
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(uploaded_file.getbuffer())
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+
+    def report(done, total, written, cached):
+        progress_bar.progress(done / total)
+        status.write(f"Page {done}/{total} · {written} tables extracted · {cached} pages reused from cache")
+
+    try:
+        excel_file, table_count = stream_tables_to_excel(tmp.name, progress=report, cache_dir=DEFAULT_CACHE_DIR)
+    finally:
+        os.remove(tmp.name)
+
+    if table_count:
+        st.write(f"Extracted {table_count} tables from the PDF.")
+        st.download_button(
+            label="Download Excel File",
+            data=excel_file,
+            file_name="extracted_data.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    else:
+        st.write("No tables found in the PDF.")
+
+elif uploaded_file is not None:
     st.write("Extracting tables from the PDF...")
     tables = extract_tables_from_pdf(uploaded_file)
 
@@ -3,8 +3,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
 from dotenv import load_dotenv
-from groq import Groq  # Ensure groq is installed and configured
+from fpa_engine import project, ScenarioCube, tornado, simulate_ebitda
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.llm import get_llm, chat_messages  # Pooled, cached Groq client shared by all apps
 
 # -------------------------------
 # Setup & Environment
@@ -35,21 +39,50 @@ initial_revenue = st.number_input("Initial Revenue (in millions)", value=50.0, s
 cogs_pct = st.number_input("COGS as % of Revenue", value=40.0, step=0.5)
 opex_pct = st.number_input("Operating Expenses as % of Revenue", value=20.0, step=0.5)
 forecast_years = st.slider("Forecast Period (years)", 1, 10, 5)
+forecast_mode = st.radio("Forecast Mode", ["Deterministic", "Monte Carlo"], horizontal=True)
+
+def distribution_spec(kind, center, spread):
+    """Turn a UI choice into an fpa_engine distribution centred on the deterministic input."""
+    if kind == "Normal":
+        return ("normal", center, spread)
+    if kind == "Uniform":
+        return ("uniform", center - spread, center + spread)
+    return ("triangular", center - spread, center, center + spread)
+
+@st.cache_data
+def run_simulation(initial_revenue, growth_dist, cogs_dist, opex_dist, years, n_paths):
+    return simulate_ebitda(initial_revenue, growth_dist, cogs_dist, opex_dist, years, n_paths=n_paths, seed=42)
+
+mc_bands = None
+if forecast_mode == "Monte Carlo":
+    st.write("Each driver is redrawn for every simulated path and year around the inputs above.")
+    kinds = ["Normal", "Uniform", "Triangular"]
+    mc_col1, mc_col2, mc_col3 = st.columns(3)
+    with mc_col1:
+        growth_kind = st.selectbox("Growth distribution", kinds)
+        growth_spread = st.number_input("Growth uncertainty (± pp / σ)", value=3.0, min_value=0.0, step=0.5)
+    with mc_col2:
+        cogs_kind = st.selectbox("COGS % distribution", kinds, index=2)
+        cogs_spread = st.number_input("COGS uncertainty (± pp / σ)", value=5.0, min_value=0.0, step=0.5)
+    with mc_col3:
+        opex_kind = st.selectbox("OpEx % distribution", kinds, index=1)
+        opex_spread = st.number_input("OpEx uncertainty (± pp / σ)", value=2.0, min_value=0.0, step=0.5)
+    n_paths = st.number_input("Simulated paths", min_value=1_000, max_value=2_000_000, value=100_000, step=10_000)
+
+    mc_bands = run_simulation(
+        initial_revenue,
+        distribution_spec(growth_kind, revenue_growth, growth_spread),
+        distribution_spec(cogs_kind, cogs_pct, cogs_spread),
+        distribution_spec(opex_kind, opex_pct, opex_spread),
+        forecast_years,
+        int(n_paths),
+    )
 
-# Forecast calculations
-years = list(range(1, forecast_years + 1))
-forecast_revenue = [initial_revenue * ((1 + revenue_growth/100.0) ** year) for year in years]
-forecast_cogs = [rev * (cogs_pct/100.0) for rev in forecast_revenue]
-forecast_opex = [rev * (opex_pct/100.0) for rev in forecast_revenue]
-forecast_ebitda = [rev - cogs - opex for rev, cogs, opex in zip(forecast_revenue, forecast_cogs, forecast_opex)]
-
-df_forecast = pd.DataFrame({
-    "Year": years,
-    "Revenue (M)": forecast_revenue,
-    "COGS (M)": forecast_cogs,
-    "OpEx (M)": forecast_opex,
-    "EBITDA (M)": forecast_ebitda
-})
+# Forecast calculations (closed form, vectorized)
+df_forecast = pd.DataFrame(project(initial_revenue, revenue_growth, cogs_pct, opex_pct, forecast_years))
+years = df_forecast["Year"].tolist()
+forecast_revenue = df_forecast["Revenue (M)"].tolist()
+forecast_ebitda = df_forecast["EBITDA (M)"].tolist()
 
 st.subheader("Forecasted Financials")
 st.dataframe(df_forecast)
@@ -57,13 +90,87 @@ st.dataframe(df_forecast)
 # Visualization of the forecasts
 fig, ax = plt.subplots(figsize=(10, 6))
 ax.plot(years, forecast_revenue, marker='o', label="Revenue")
-ax.plot(years, forecast_ebitda, marker='o', label="EBITDA")
+if mc_bands is None:
+    ax.plot(years, forecast_ebitda, marker='o', label="EBITDA")
+else:
+    ax.fill_between(years, mc_bands["P5"], mc_bands["P95"], alpha=0.3, label="EBITDA P5–P95")
+    ax.plot(years, mc_bands["P50"], marker='o', label="EBITDA P50")
 ax.set_xlabel("Year")
 ax.set_ylabel("Amount (in millions)")
 ax.set_title("Financial Forecast")
 ax.legend()
 st.pyplot(fig)
 
+if mc_bands is not None:
+    st.subheader("Monte Carlo EBITDA Bands")
+    st.dataframe(mc_bands)
+
+# -------------------------------
+# 📐 Scenario Grid & Sensitivity Analysis
+# Evaluate every growth × COGS% × OpEx% combination in one broadcasted computation.
+# -------------------------------
+with st.expander("📐 Scenario Grid & Sensitivity Analysis"):
+    grid_col1, grid_col2, grid_col3 = st.columns(3)
+    with grid_col1:
+        growth_low = float(np.clip(revenue_growth - 5, -20.0, 50.0))
+        growth_high = float(np.clip(revenue_growth + 5, -20.0, 50.0))
+        growth_range = st.slider("Revenue Growth range (%)", -20.0, 50.0, (growth_low, growth_high))
+        growth_steps = st.number_input("Growth steps", 2, 200, 25)
+    with grid_col2:
+        cogs_low = float(np.clip(cogs_pct - 10, 0.0, 100.0))
+        cogs_high = float(np.clip(cogs_pct + 10, 0.0, 100.0))
+        cogs_range = st.slider("COGS % range", 0.0, 100.0, (cogs_low, cogs_high))
+        cogs_steps = st.number_input("COGS steps", 2, 200, 21)
+    with grid_col3:
+        opex_low = float(np.clip(opex_pct - 10, 0.0, 100.0))
+        opex_high = float(np.clip(opex_pct + 10, 0.0, 100.0))
+        opex_range = st.slider("OpEx % range", 0.0, 100.0, (opex_low, opex_high))
+        opex_steps = st.number_input("OpEx steps", 2, 200, 21)
+
+    cube = ScenarioCube(
+        initial_revenue,
+        np.linspace(*growth_range, int(growth_steps)),
+        np.linspace(*cogs_range, int(cogs_steps)),
+        np.linspace(*opex_range, int(opex_steps)),
+        forecast_years,
+    )
+    final_cumulative = cube.cumulative_ebitda(forecast_years)
+    st.write(f"Evaluated **{cube.n_scenarios:,}** scenarios over {forecast_years} years.")
+    st.write(
+        f"Cumulative EBITDA (M): min {final_cumulative.min():,.2f} · "
+        f"median {np.median(final_cumulative):,.2f} · max {final_cumulative.max():,.2f}"
+    )
+
+    st.write(f"**Year {forecast_years} EBITDA (M): Growth × COGS % at OpEx ≈ {opex_pct}%**")
+    st.dataframe(cube.sensitivity_table(opex_pct).style.format("{:.2f}").background_gradient(cmap="RdYlGn"))
+
+    tornado_df = tornado(
+        initial_revenue,
+        {"growth": revenue_growth, "cogs_pct": cogs_pct, "opex_pct": opex_pct},
+        {"growth": growth_range, "cogs_pct": cogs_range, "opex_pct": opex_range},
+        forecast_years,
+    )
+    base_total = tornado_df.attrs["base"]
+    fig_t, ax_t = plt.subplots(figsize=(10, 3))
+    for i, row in tornado_df.iloc[::-1].reset_index(drop=True).iterrows():
+        ax_t.barh(i, row["EBITDA at Low"] - base_total, left=base_total, color="tab:red")
+        ax_t.barh(i, row["EBITDA at High"] - base_total, left=base_total, color="tab:green")
+    ax_t.set_yticks(range(len(tornado_df)))
+    ax_t.set_yticklabels(tornado_df["Driver"].iloc[::-1])
+    ax_t.axvline(base_total, color="black", linewidth=1)
+    ax_t.set_xlabel(f"Cumulative EBITDA over {forecast_years} years (M)")
+    ax_t.set_title("Tornado: EBITDA Sensitivity to Each Driver")
+    st.pyplot(fig_t)
+
+    # The tidy frame is only materialised when a download is requested
+    if st.checkbox("Prepare scenario download"):
+        st.download_button(
+            "📥 Download all scenarios (CSV)",
+            cube.to_frame().to_csv(index=False),
+            file_name="scenario_grid.csv",
+            mime="text/csv",
+        )
+
 # -------------------------------
 # 3️⃣ Define Core Instructions & Features
 # Prepare a summary of the FP&A projections for the AI agent.
@@ -81,6 +188,13 @@ fp_a_summary = f"""
 - Revenue over years: {[f'{r:.2f}' for r in forecast_revenue]}
 - EBITDA over years: {[f'{e:.2f}' for e in forecast_ebitda]}
 """
+if mc_bands is not None:
+    fp_a_summary += f"""
+**Monte Carlo EBITDA Ranges ({int(n_paths):,} paths):**
+- P5 over years: {[f'{e:.2f}' for e in mc_bands["P5"]]}
+- P50 over years: {[f'{e:.2f}' for e in mc_bands["P50"]]}
+- P95 over years: {[f'{e:.2f}' for e in mc_bands["P95"]]}
+"""
 
 st.markdown(fp_a_summary)
 
@@ -128,17 +242,12 @@ if st.button("Generate AI Insights"):
     # 7️⃣ Handling Raw LLM Outputs
     # Process the AI response for clarity and structure.
     # -------------------------------
-    client = Groq(api_key=GROQ_API_KEY)
-    response = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are an expert FP&A analyst. Provide structured, clear analysis with chain-of-thought reasoning."},
-            {"role": "user", "content": ai_input}
-        ],
-        model="llama3-8b-8192",
-    )
-    ai_commentary = response.choices[0].message.content
+    llm = get_llm(GROQ_API_KEY)
     st.markdown("### AI-Generated FP&A Insights")
-    st.write(ai_commentary)
+    st.write_stream(llm.stream(chat_messages(
+        "You are an expert FP&A analyst. Provide structured, clear analysis with chain-of-thought reasoning.",
+        ai_input,
+    )))
 
 # -------------------------------
 # 8️⃣ Scaling to Multi-Agent Systems (Advanced)
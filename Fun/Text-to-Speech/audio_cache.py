@@ -0,0 +1,49 @@
+import hashlib
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.disk_cache import evict_lru, touch, write_atomic
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "tts")
+)
+
+
+class AudioCache:
+    """Synthesized audio per (text, language, voice) on disk, evicting least recently used files past max_bytes."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text, lang, voice):
+        return hashlib.sha256(f"{lang}\0{voice}\0{text}".encode()).hexdigest()
+
+    def _path(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        path = self._path(key, fmt)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        touch(path)
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key, fmt, audio):
+        write_atomic(self._path(key, fmt), audio)
+
+    def evict(self):
+        evict_lru(self.cache_dir, self.max_bytes)
@@ -1,18 +1,34 @@
 import os
 import docx
 import streamlit as st
-from gtts import gTTS
+from tts_engine import GTTSBackend, split_text, synthesize_segments, concat_audio
+from audio_cache import AudioCache
 
 def extract_text_from_docx(file):
     """Extract text from an uploaded Word document."""
     doc = docx.Document(file)
     return "\n".join([para.text for para in doc.paragraphs])
 
-def text_to_speech(text, output_file="transcript_audio.mp3"):
-    """Convert text to speech and save as an audio file."""
-    tts = gTTS(text, lang="en")
-    tts.save(output_file)
-    return output_file
+@st.cache_resource
+def get_audio_cache():
+    return AudioCache()
+
+def text_to_speech(text, backend, on_segment=None):
+    """Convert text to speech segment by segment and return (audio bytes, failed segment errors).
+
+    Paragraphs synthesized before (same text, language and voice) come from the audio cache.
+    """
+    segments = split_text(text)
+    cache = get_audio_cache()
+    parts, errors = [], []
+    for i, audio, error in synthesize_segments(segments, backend, cache=cache):
+        parts.append(audio)
+        if error:
+            errors.append(f"Segment {i + 1}: {error}")
+        if on_segment:
+            on_segment(i, len(segments), audio)
+    cache.evict()
+    return concat_audio(parts, backend.format), errors
 
 # Streamlit UI
 st.title("Word Document to Speech Converter")
@@ -29,12 +45,29 @@ if uploaded_file is not None:
             st.write("Extracted Text:")
             st.text_area("Text Content", text, height=250)
 
-            # Convert text to speech
-            audio_file = text_to_speech(text)
+            # Convert text to speech; the first segment plays while the rest is generated
+            backend = GTTSBackend(lang="en")
+            progress_bar = st.progress(0.0)
+            first_segment = st.empty()
+
+            def show_progress(i, total, audio):
+                progress_bar.progress((i + 1) / total)
+                if i == 0 and audio:
+                    first_segment.audio(audio, format=backend.mime)
+
+            hits_before = get_audio_cache().hits
+            audio, errors = text_to_speech(text, backend, on_segment=show_progress)
+            first_segment.empty()
+            reused = get_audio_cache().hits - hits_before
+            if reused:
+                st.caption(f"♻️ Reused audio for {reused} unchanged paragraphs.")
+            for error in errors:
+                st.warning(f"Skipped a segment that could not be converted: {error}")
 
-            # Provide a download link
-            with open(audio_file, "rb") as file:
-                st.download_button(label="Download Speech", data=file, file_name="transcript_audio.mp3", mime="audio/mp3")
+            # Play and download the full audio from memory
+            st.audio(audio, format=backend.mime)
+            stem = os.path.splitext(uploaded_file.name)[0] or "transcript_audio"
+            st.download_button(label="Download Speech", data=audio, file_name=f"{stem}.{backend.format}", mime=backend.mime)
         
         else:
             st.warning("The document is empty.")
@@ -0,0 +1,140 @@
+import io
+import math
+import re
+import struct
+import time
+import wave
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_text(text, max_chars=1000):
+    """Split text into segments of at most max_chars, breaking on paragraphs, then sentences, then words."""
+    segments = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            segments.append(paragraph)
+            continue
+        current = ""
+        for sentence in SENTENCE_SPLIT.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    segments.append(current)
+                    current = ""
+                segments.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            segments.append(current)
+    return segments
+
+
+class GTTSBackend:
+    """Google Translate text-to-speech; returns MP3 bytes."""
+
+    format = "mp3"
+    mime = "audio/mp3"
+
+    def __init__(self, lang="en", tld="com"):
+        self.lang = lang
+        self.tld = tld
+        self.voice = f"gtts-{tld}"
+
+    def synthesize(self, text):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=self.lang, tld=self.tld).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class ToneBackend:
+    """Offline stand-in engine for tests: one short tone per word, as 16-bit mono WAV."""
+
+    format = "wav"
+    mime = "audio/wav"
+
+    def __init__(self, lang="en", sample_rate=8000, word_seconds=0.05):
+        self.lang = lang
+        self.sample_rate = sample_rate
+        self.word_seconds = word_seconds
+        self.voice = f"tone-{sample_rate}-{word_seconds}"
+
+    def synthesize(self, text):
+        frames_per_word = int(self.sample_rate * self.word_seconds)
+        samples = []
+        for word in text.split():
+            freq = 300 + zlib.crc32(word.encode()) % 500
+            samples.extend(
+                int(8000 * math.sin(2 * math.pi * freq * n / self.sample_rate)) for n in range(frames_per_word)
+            )
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+        return buffer.getvalue()
+
+
+def concat_audio(parts, fmt):
+    """Join audio segments in order: MP3 frames concatenate directly, WAV data is re-wrapped."""
+    parts = [part for part in parts if part]
+    if fmt == "mp3":
+        return b"".join(parts)
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as out:
+        for i, part in enumerate(parts):
+            with wave.open(io.BytesIO(part), "rb") as segment:
+                if i == 0:
+                    out.setparams(segment.getparams())
+                out.writeframes(segment.readframes(segment.getnframes()))
+    return output.getvalue()
+
+
+def _synthesize_with_retries(backend, text, retries, backoff, cache=None):
+    if cache is not None:
+        key = cache.key(text, backend.lang, backend.voice)
+        audio = cache.get(key, backend.format)
+        if audio is not None:
+            return audio, None
+
+    for attempt in range(retries):
+        try:
+            audio = backend.synthesize(text)
+            break
+        except Exception as e:
+            if attempt == retries - 1:
+                return None, f"{type(e).__name__}: {e}"
+            time.sleep(backoff * 2 ** attempt)
+
+    if cache is not None:
+        cache.put(key, backend.format, audio)
+    return audio, None
+
+
+def synthesize_segments(segments, backend, max_workers=4, retries=3, backoff=0.5, cache=None):
+    """Synthesize segments concurrently and yield (index, audio, error) in segment order.
+
+    Each segment is yielded as soon as it and all earlier ones are done, so playback can start
+    on the first segment while later ones are still being generated. A segment that keeps
+    failing is yielded with audio None instead of aborting the whole document.
+    With an AudioCache, segments synthesized before are read back instead of regenerated.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_synthesize_with_retries, backend, text, retries, backoff, cache) for text in segments]
+        for i, future in enumerate(futures):
+            audio, error = future.result()
+            yield i, audio, error
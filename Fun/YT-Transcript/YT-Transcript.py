@@ -1,10 +1,19 @@
 import streamlit as st
 import os
-import re
+import sys
+import asyncio
 from dotenv import load_dotenv
-from groq import Groq
 from youtube_transcript_api import YouTubeTranscriptApi
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.llm import get_llm, chat_messages, estimate_tokens, DEFAULT_MODEL
+from summarizer import map_reduce_summarize
+from transcript_cache import TranscriptStore
+from batch_summarize import batch_output_path, extract_video_id, summarize_videos
+
+# Transcripts longer than this are summarized chunk by chunk, then merged
+MAX_CHUNK_TOKENS = 3000
+
 # Load API key securely
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -17,56 +26,106 @@ st.set_page_config(page_title="YouTube AI Agent", page_icon="📺", layout="wide
 
 st.title("🎬 YouTube AI Agent: Video & Summary Generator")
 
+# Transcripts and summaries persist across reruns, sessions and users
+@st.cache_resource
+def get_store():
+    return TranscriptStore()
+
+store = get_store()
+LANGUAGE = "en"
+
 # Input for YouTube Link
 youtube_url = st.text_input("Enter YouTube Video URL", "https://www.youtube.com/watch?v=rN49URY3Q_c&t=3s")
 
-# Extract video ID
-def extract_video_id(url):
-    pattern = r"(?:v=|/)([0-9A-Za-z_-]{11}).*"
-    match = re.search(pattern, url)
-    return match.group(1) if match else None
-
-# Get Transcript
+# Get Transcript (timed segments with text, start and duration), from the store when possible
 def get_transcript(video_id):
+    cached = store.get_transcript(video_id, LANGUAGE)
+    if cached:
+        return cached["segments"]
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-        return " ".join([entry["text"] for entry in transcript])
+        segments = YouTubeTranscriptApi.get_transcript(video_id, languages=[LANGUAGE])
+        store.put_transcript(video_id, LANGUAGE, segments)
+        return segments
     except Exception as e:
         st.error(f"Error fetching transcript: {e}")
         return None
 
-# Summarization Function
+# Summarization Function (streams the summary as it is generated)
 def summarize_text(text):
-    client = Groq(api_key=GROQ_API_KEY)
+    llm = get_llm(GROQ_API_KEY)
     prompt = f"""
     Summarize the following YouTube transcript:
     {text}
     Provide key insights in bullet points.
     """
-    response = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are an AI assistant that summarizes YouTube transcripts."},
-            {"role": "user", "content": prompt}
-        ],
-        model="llama3-8b-8192",
-    )
-    return response.choices[0].message.content
+    return llm.stream(chat_messages("You are an AI assistant that summarizes YouTube transcripts.", prompt))
 
 # Process Video if URL is provided
 if youtube_url:
     video_id = extract_video_id(youtube_url)
     if video_id:
         st.video(youtube_url)
-        transcript = get_transcript(video_id)
-        if transcript:
+        segments = get_transcript(video_id)
+        if segments:
+            transcript = " ".join([entry["text"] for entry in segments])
             st.subheader("📜 Transcript Preview")
             st.write(transcript[:1000] + "..." if len(transcript) > 1000 else transcript)
             
             st.subheader("📝 AI-Generated Summary")
-            summary = summarize_text(transcript)
-            st.write(summary)
+            summary = store.get_summary(video_id, LANGUAGE, DEFAULT_MODEL)
+            if summary:
+                st.write(summary)
+            else:
+                if estimate_tokens(transcript) <= MAX_CHUNK_TOKENS:
+                    summary = st.write_stream(summarize_text(transcript))
+                else:
+                    # Long video: summarize chunks concurrently, then merge the partial summaries
+                    with st.status("Summarizing a long transcript in parts...") as status:
+                        def report(stage, done, total):
+                            status.update(label=f"Summarizing ({stage}): {done}/{total}")
+
+                        summary = map_reduce_summarize(segments, get_llm(GROQ_API_KEY).complete,
+                                                       max_chunk_tokens=MAX_CHUNK_TOKENS, concurrency=4, progress=report)
+                        status.update(label="Summary ready", state="complete")
+                    st.write(summary)
+                store.put_summary(video_id, LANGUAGE, DEFAULT_MODEL, summary)
     else:
         st.error("Invalid YouTube URL. Please check and try again.")
 
+# 📚 Batch Mode: summarize a list of videos or a whole playlist export
+with st.expander("📚 Batch mode (many videos)"):
+    url_text = st.text_area("One YouTube URL per line")
+    url_file = st.file_uploader("...or upload a .txt file of URLs", type=["txt"])
+    urls = url_text.splitlines() + (url_file.getvalue().decode().splitlines() if url_file else [])
+
+    if st.button("🚀 Summarize all") and urls:
+        # Same URL list -> same output file, so an interrupted batch resumes where it stopped
+        out_path = batch_output_path(urls)
+        progress_bar = st.progress(0.0)
+        log = st.empty()
+
+        def report(done, total, record):
+            progress_bar.progress(done / total)
+            log.write(f"{done}/{total} · {record['video_id']}: {record['status']}")
+
+        def fetch(video_id, language):
+            return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+
+        asyncio.run(summarize_videos(urls, out_path, get_llm(GROQ_API_KEY).complete, fetch,
+                                     store=store, language=LANGUAGE, progress=report))
+        progress_bar.progress(1.0)
+
+        if os.path.exists(out_path):
+            with open(out_path, "r") as f:
+                results = f.read()
+            st.download_button("📥 Download results (JSONL)", results, file_name="youtube_summaries.jsonl",
+                               mime="application/jsonl")
+        else:
+            st.warning("No valid YouTube URLs found.")
+
 st.markdown("---")
+st.caption(
+    "Cache: transcripts {transcript_hits} hits / {transcript_misses} misses · "
+    "summaries {summary_hits} hits / {summary_misses} misses".format(**store.stats)
+)
 st.markdown("Built with AI by Christian Martinez. [Learn how to build this here](https://www.youtube.com/watch?v=dn6zWMuI2q8&t=129s)")
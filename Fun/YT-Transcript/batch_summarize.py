@@ -0,0 +1,220 @@
+"""Summarize many YouTube videos in one run.
+
+Usage:
+    python batch_summarize.py urls.txt --out results.jsonl [--parquet results.parquet]
+
+Results are appended to the JSONL file as each video finishes; re-running with the same
+output file skips videos that already succeeded, so interrupted runs resume where they stopped.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.disk_cache import evict_lru
+from shared.llm import DEFAULT_MODEL
+from summarizer import map_reduce_summarize_async
+from transcript_cache import TranscriptStore
+
+
+BATCH_OUTPUT_DIR = os.getenv(
+    "YT_BATCH_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "yt_batches")
+)
+
+# Errors worth another attempt: rate limits, server errors, timeouts and dropped connections
+TRANSIENT_NAMES = ("RateLimit", "TooManyRequests", "Timeout", "Connection", "InternalServer", "ServiceUnavailable")
+
+
+def extract_video_id(url):
+    pattern = r"(?:v=|/)([0-9A-Za-z_-]{11}).*"
+    match = re.search(pattern, url)
+    return match.group(1) if match else None
+
+
+def unique_video_ids(urls):
+    """Map each distinct video id to the first URL it appeared in, keeping input order."""
+    videos = {}
+    for url in urls:
+        url = url.strip()
+        video_id = extract_video_id(url) if url and not url.startswith("#") else None
+        if video_id and video_id not in videos:
+            videos[video_id] = url
+    return videos
+
+
+def completed_ids(path):
+    """Video ids already summarized successfully in an existing output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["video_id"])
+    return done
+
+
+def batch_output_path(urls, out_dir=BATCH_OUTPUT_DIR, max_bytes=64 * 1024 ** 2):
+    """Output file for a URL list in its own directory, trimming old batch files past max_bytes.
+
+    The same URL list maps to the same file, so an interrupted batch resumes where it stopped.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    evict_lru(out_dir, max_bytes, suffixes=[".jsonl"])
+    batch_id = hashlib.sha256("\n".join(sorted(u.strip() for u in urls)).encode()).hexdigest()[:16]
+    return os.path.join(out_dir, f"batch_{batch_id}.jsonl")
+
+
+def is_transient(error):
+    """True for errors a retry can fix (HTTP 429/5xx, timeouts), not e.g. a disabled or missing transcript."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return any(name in type(error).__name__ for name in TRANSIENT_NAMES)
+
+
+class RateLimiter:
+    """Spaces out request starts to at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _with_retries(func, retries, backoff, limiter):
+    for attempt in range(retries):
+        await limiter.wait()
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == retries - 1 or not is_transient(e):
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def summarize_videos(urls, out_path, complete, fetch_transcript, store=None, language="en",
+                           model=DEFAULT_MODEL, concurrency=4, rate=2.0, retries=3, backoff=1.0,
+                           progress=None):
+    """Fetch and summarize every distinct video through a bounded asyncio pool.
+
+    fetch_transcript(video_id, language) returns timed segments and complete(messages) returns
+    reply text; both are blocking and run in worker threads. Each result is appended to out_path
+    as one JSON line. progress, if given, is called as progress(done, total, record).
+    Returns the number of videos processed in this run.
+    """
+    store = store or TranscriptStore()
+    videos = unique_video_ids(urls)
+    skip = completed_ids(out_path)
+    todo = [(video_id, url) for video_id, url in videos.items() if video_id not in skip]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    write_lock = asyncio.Lock()
+    done = 0
+
+    async def request(messages):
+        # Each LLM call is rate limited and retried on its own, so one failure does not redo the video
+        return await _with_retries(lambda: asyncio.to_thread(complete, messages), retries, backoff, limiter)
+
+    async def process(video_id, url):
+        nonlocal done
+        record = {"video_id": video_id, "url": url, "language": language, "model": model}
+        async with semaphore:
+            try:
+                entry = store.get_transcript(video_id, language)
+                if entry is None:
+                    segments = await _with_retries(
+                        lambda: asyncio.to_thread(fetch_transcript, video_id, language), retries, backoff, limiter
+                    )
+                    entry = store.put_transcript(video_id, language, segments)
+
+                summary = store.get_summary(video_id, language, model)
+                if summary is None:
+                    summary = await map_reduce_summarize_async(
+                        entry["segments"], complete, concurrency=2, request=request
+                    )
+                    store.put_summary(video_id, language, model, summary)
+                record.update(status="ok", summary=summary)
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+
+        async with write_lock:
+            with open(out_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            done += 1
+            if progress:
+                progress(done, len(todo), record)
+
+    await asyncio.gather(*(process(video_id, url) for video_id, url in todo))
+    return len(todo)
+
+
+def jsonl_to_parquet(jsonl_path, parquet_path):
+    """Keep the latest record per video and write them as Parquet."""
+    import pandas as pd
+
+    records = pd.read_json(jsonl_path, lines=True)
+    records.drop_duplicates("video_id", keep="last").to_parquet(parquet_path, index=False)
+
+
+def main():
+    from dotenv import load_dotenv
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from shared.llm import get_llm
+
+    parser = argparse.ArgumentParser(description="Summarize a list of YouTube videos.")
+    parser.add_argument("urls", help="file with one YouTube URL per line ('-' for stdin)")
+    parser.add_argument("--out", default="summaries.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--parquet", help="also write the results to this Parquet file at the end")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--concurrency", type=int, default=4, help="videos processed at once")
+    parser.add_argument("--rate", type=float, default=2.0, help="max requests started per second")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        sys.exit("GROQ_API_KEY is not set.")
+
+    urls = sys.stdin.readlines() if args.urls == "-" else open(args.urls).readlines()
+    llm = get_llm(api_key)
+
+    def fetch(video_id, language):
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+
+    def report(done, total, record):
+        print(f"[{done}/{total}] {record['video_id']}: {record['status']}", file=sys.stderr)
+
+    processed = asyncio.run(summarize_videos(
+        urls, args.out, llm.complete, fetch, language=args.language, concurrency=args.concurrency,
+        rate=args.rate, retries=args.retries, progress=report,
+    ))
+    print(f"Processed {processed} videos; results in {args.out}", file=sys.stderr)
+    if args.parquet:
+        jsonl_to_parquet(args.out, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
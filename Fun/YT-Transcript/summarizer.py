@@ -0,0 +1,168 @@
+import asyncio
+import re
+
+from shared.llm import chat_messages, estimate_tokens
+
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+MAP_SYSTEM = "You are an AI assistant that summarizes parts of YouTube transcripts."
+REDUCE_SYSTEM = "You are an AI assistant that merges partial summaries of a YouTube video."
+
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def _split_long_segment(segment, max_tokens):
+    """Break one oversized segment into sentence-aligned pieces sharing its timestamp."""
+    pieces, current = [], ""
+    for sentence in SENTENCE_SPLIT.split(segment["text"]):
+        if current and estimate_tokens(current + " " + sentence) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return [{**segment, "text": piece} for piece in pieces]
+
+
+def chunk_segments(segments, max_tokens=3000):
+    """Group timed transcript segments into chunks of at most about max_tokens tokens.
+
+    Chunks only break between segments, and preferably after one that ends a sentence.
+    Each chunk is a dict with text, start and end (seconds).
+    """
+    expanded = []
+    for segment in segments:
+        if estimate_tokens(segment["text"]) > max_tokens:
+            expanded.extend(_split_long_segment(segment, max_tokens))
+        else:
+            expanded.append(segment)
+
+    chunks, current, size = [], [], 0
+    for segment in expanded:
+        tokens = estimate_tokens(segment["text"])
+        if current and size + tokens > max_tokens:
+            # Move the unfinished sentence at the tail into the next chunk when that is possible,
+            # but only if the carried tail and this segment still fit the budget together
+            cut, tail = len(current), 0
+            for i in range(len(current) - 1, len(current) // 2 - 1, -1):
+                if SENTENCE_END.search(current[i]["text"].strip()):
+                    cut = i + 1 if tail + tokens <= max_tokens else len(current)
+                    break
+                tail += estimate_tokens(current[i]["text"])
+            chunks.append(current[:cut])
+            current = current[cut:]
+            size = sum(estimate_tokens(s["text"]) for s in current)
+        current.append(segment)
+        size += tokens
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            "text": " ".join(s["text"] for s in chunk),
+            "start": chunk[0].get("start", 0.0),
+            "end": chunk[-1].get("start", 0.0) + chunk[-1].get("duration", 0.0),
+        }
+        for chunk in chunks
+    ]
+
+
+def map_prompt(chunk):
+    return f"""
+    Summarize this part of a YouTube transcript ({format_timestamp(chunk['start'])}–{format_timestamp(chunk['end'])}):
+    {chunk['text']}
+    Provide key insights in bullet points.
+    """
+
+
+def reduce_prompt(summaries, final):
+    joined = "\n\n".join(summaries)
+    instruction = (
+        "Combine them into one summary of the whole video with key insights in bullet points."
+        if final else
+        "Merge them into one shorter set of bullet points, keeping the timestamps."
+    )
+    return f"""
+    Below are summaries of consecutive parts of a YouTube video, in order:
+    {joined}
+    {instruction}
+    """
+
+
+def _group_by_budget(texts, max_tokens):
+    groups, current, size = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and size + tokens > max_tokens:
+            groups.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def _run_all(request, jobs, semaphore, progress=None):
+    done = 0
+
+    async def run(messages):
+        nonlocal done
+        async with semaphore:
+            result = await request(messages)
+        done += 1
+        if progress:
+            progress(done, len(jobs))
+        return result
+
+    return await asyncio.gather(*(run(messages) for messages in jobs))
+
+
+async def map_reduce_summarize_async(segments, complete, max_chunk_tokens=3000, concurrency=4, progress=None,
+                                     request=None):
+    """Summarize chunks concurrently, then reduce the summaries level by level until one is left.
+
+    complete(messages) sends a chat prompt and returns the reply text (e.g. LLMClient.complete).
+    request, if given, is an async function(messages) used for every call instead, e.g. to add
+    rate limiting and retries around each request. progress, if given, is called as
+    progress(stage, done, total).
+    """
+    request = request or (lambda messages: asyncio.to_thread(complete, messages))
+    semaphore = asyncio.Semaphore(concurrency)
+    chunks = chunk_segments(segments, max_chunk_tokens)
+
+    jobs = [chat_messages(MAP_SYSTEM, map_prompt(chunk)) for chunk in chunks]
+    report = (lambda done, total: progress("map", done, total)) if progress else None
+    summaries = await _run_all(request, jobs, semaphore, report)
+    summaries = [
+        f"[{format_timestamp(chunk['start'])}–{format_timestamp(chunk['end'])}]\n{summary}"
+        for chunk, summary in zip(chunks, summaries)
+    ]
+
+    level = 0
+    while len(summaries) > 1:
+        level += 1
+        groups = _group_by_budget(summaries, max_chunk_tokens)
+        if len(groups) == len(summaries):
+            # Summaries too long to pair up; merge two at a time so the tree still shrinks
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        final = len(groups) == 1
+        jobs = [chat_messages(REDUCE_SYSTEM, reduce_prompt(group, final)) for group in groups]
+        report = (lambda done, total, level=level: progress(f"reduce {level}", done, total)) if progress else None
+        summaries = await _run_all(request, jobs, semaphore, report)
+        if final:
+            return summaries[0]
+
+    # A single chunk needs no reduce step beyond its own summary
+    return summaries[0].split("\n", 1)[1] if summaries else ""
+
+
+def map_reduce_summarize(segments, complete, **kwargs):
+    return asyncio.run(map_reduce_summarize_async(segments, complete, **kwargs))
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.disk_cache import evict_lru, touch, write_atomic
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "TRANSCRIPT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "transcripts")
+)
+
+
+class TranscriptStore:
+    """On-disk store of transcripts and their summaries, one JSON file per (video_id, language).
+
+    Each file holds the timed segments, the joined text and a summary per model. Least
+    recently used files are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=256 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"transcript_hits": 0, "transcript_misses": 0, "summary_hits": 0, "summary_misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, video_id, language):
+        name = hashlib.sha256(f"{video_id}:{language}".encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _read(self, video_id, language):
+        path = self._path(video_id, language)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return entry
+
+    def _write(self, video_id, language, entry):
+        write_atomic(self._path(video_id, language), json.dumps(entry))
+        evict_lru(self.cache_dir, self.max_bytes, suffixes=[".json"])
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_transcript(self, video_id, language="en"):
+        """Stored entry with segments and text, or None."""
+        entry = self._read(video_id, language)
+        self._count("transcript_hits" if entry else "transcript_misses")
+        return entry
+
+    def put_transcript(self, video_id, language, segments):
+        with self._lock:
+            entry = self._read(video_id, language) or {"summaries": {}}
+            entry.update({
+                "video_id": video_id,
+                "language": language,
+                "segments": segments,
+                "text": " ".join(segment["text"] for segment in segments),
+                "updated": time.time(),
+            })
+            self._write(video_id, language, entry)
+        return entry
+
+    def get_summary(self, video_id, language, model):
+        entry = self._read(video_id, language)
+        summary = (entry or {}).get("summaries", {}).get(model)
+        self._count("summary_hits" if summary is not None else "summary_misses")
+        return summary
+
+    def put_summary(self, video_id, language, model, summary):
+        with self._lock:
+            entry = self._read(video_id, language)
+            if entry is None:
+                return  # summaries only live alongside their transcript
+            entry["summaries"][model] = summary
+            self._write(video_id, language, entry)
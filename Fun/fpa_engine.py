@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+def project(initial_revenue, revenue_growth, cogs_pct, opex_pct, years):
+    """Closed-form projection of one scenario; percentages are given as e.g. 10.0 for 10%.
+
+    Returns a dict of arrays indexed by year 1..years.
+    """
+    year = np.arange(1, years + 1)
+    revenue = initial_revenue * (1 + revenue_growth / 100.0) ** year
+    cogs = revenue * (cogs_pct / 100.0)
+    opex = revenue * (opex_pct / 100.0)
+    return {
+        "Year": year,
+        "Revenue (M)": revenue,
+        "COGS (M)": cogs,
+        "OpEx (M)": opex,
+        "EBITDA (M)": revenue - cogs - opex,
+    }
+
+
+class ScenarioCube:
+    """All growth x COGS% x OpEx% x year combinations evaluated in a single broadcast.
+
+    Every metric array has shape (len(growth), len(cogs_pct), len(opex_pct), horizon).
+    """
+
+    def __init__(self, initial_revenue, growth, cogs_pct, opex_pct, horizon):
+        self.initial_revenue = initial_revenue
+        self.growth = np.asarray(growth, dtype=float)
+        self.cogs_pct = np.asarray(cogs_pct, dtype=float)
+        self.opex_pct = np.asarray(opex_pct, dtype=float)
+        self.years = np.arange(1, horizon + 1)
+
+        g = self.growth[:, None, None, None] / 100.0
+        c = self.cogs_pct[None, :, None, None] / 100.0
+        o = self.opex_pct[None, None, :, None] / 100.0
+        y = self.years[None, None, None, :]
+
+        revenue = initial_revenue * (1 + g) ** y
+        shape = (len(self.growth), len(self.cogs_pct), len(self.opex_pct), len(self.years))
+        self.revenue = np.broadcast_to(revenue, shape)
+        self.cogs = np.broadcast_to(revenue * c, shape)
+        self.opex = np.broadcast_to(revenue * o, shape)
+        self.ebitda = revenue * (1 - c - o)
+
+    @property
+    def n_scenarios(self):
+        return self.ebitda[..., 0].size
+
+    def cumulative_ebitda(self, horizon=None):
+        """Cumulative EBITDA up to each year (or only the given horizon) for every scenario."""
+        cumulative = self.ebitda.cumsum(axis=-1)
+        if horizon is None:
+            return cumulative
+        return cumulative[..., horizon - 1]
+
+    def to_frame(self):
+        """Tidy frame with one row per scenario and year."""
+        g, c, o, y = np.meshgrid(self.growth, self.cogs_pct, self.opex_pct, self.years, indexing="ij")
+        return pd.DataFrame({
+            "Revenue Growth (%)": g.ravel(),
+            "COGS (%)": c.ravel(),
+            "OpEx (%)": o.ravel(),
+            "Year": y.ravel(),
+            "Revenue (M)": np.ravel(self.revenue),
+            "COGS (M)": np.ravel(self.cogs),
+            "OpEx (M)": np.ravel(self.opex),
+            "EBITDA (M)": self.ebitda.ravel(),
+        })
+
+    def sensitivity_table(self, opex_pct, year=None):
+        """EBITDA in the given year (default: last) across growth x COGS% at the OpEx% closest to opex_pct."""
+        k = int(np.abs(self.opex_pct - opex_pct).argmin())
+        j = (year or len(self.years)) - 1
+        return pd.DataFrame(
+            self.ebitda[:, :, k, j],
+            index=pd.Index(self.growth, name="Revenue Growth (%)"),
+            columns=pd.Index(self.cogs_pct, name="COGS (%)"),
+        )
+
+
+def tornado(initial_revenue, base, ranges, horizon):
+    """One-at-a-time swing in cumulative EBITDA over the horizon.
+
+    base maps driver -> base value and ranges maps driver -> (low, high), with drivers
+    "growth", "cogs_pct" and "opex_pct". Rows are sorted by swing, largest first.
+    """
+    labels = {"growth": "Revenue Growth (%)", "cogs_pct": "COGS (%)", "opex_pct": "OpEx (%)"}
+    drivers = list(labels)
+    # Row 0 is the base case, then a low and a high row per driver
+    values = np.tile([base[d] for d in drivers], (1 + 2 * len(drivers), 1)).astype(float)
+    for i, d in enumerate(drivers):
+        values[1 + 2 * i, i], values[2 + 2 * i, i] = ranges[d]
+
+    year = np.arange(1, horizon + 1)
+    revenue = initial_revenue * (1 + values[:, [0]] / 100.0) ** year
+    margin = 1 - values[:, [1]] / 100.0 - values[:, [2]] / 100.0
+    total = (revenue * margin).sum(axis=1)
+
+    base_total = total[0]
+    rows = []
+    for i, d in enumerate(drivers):
+        low, high = total[1 + 2 * i], total[2 + 2 * i]
+        rows.append({
+            "Driver": labels[d],
+            "Low Input": ranges[d][0],
+            "High Input": ranges[d][1],
+            "EBITDA at Low": low,
+            "EBITDA at High": high,
+            "Swing": abs(high - low),
+        })
+    result = pd.DataFrame(rows).sort_values("Swing", ascending=False).reset_index(drop=True)
+    result.attrs["base"] = base_total
+    return result
+
+
+def draw(dist, rng, size):
+    """Sample percentages from a distribution spec such as ("normal", mean, sd).
+
+    Supported kinds: ("fixed", value), ("normal", mean, sd), ("uniform", low, high)
+    and ("triangular", low, mode, high).
+    """
+    kind, *args = dist
+    if kind == "fixed":
+        return np.full(size, float(args[0]))
+    if kind == "normal":
+        return rng.normal(args[0], args[1], size)
+    if kind == "uniform":
+        return rng.uniform(args[0], args[1], size)
+    if kind == "triangular":
+        return rng.triangular(args[0], args[1], args[2], size)
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+class StreamingQuantiles:
+    """Per-column histogram that estimates quantiles without keeping the samples.
+
+    Bin edges are set from the first chunk, padded by its spread on both sides;
+    later values outside that range are counted in the edge bins.
+    """
+
+    def __init__(self, n_columns, bins=4096):
+        self.n_columns = n_columns
+        self.bins = bins
+        self.edges = None
+        self.counts = np.zeros((n_columns, bins), dtype=np.int64)
+        self.total = 0
+        self.sum = np.zeros(n_columns)
+
+    def update(self, values):
+        if self.edges is None:
+            lo, hi = values.min(axis=0), values.max(axis=0)
+            span = np.maximum(hi - lo, 1e-9)
+            self.edges = np.linspace(lo - span, hi + span, self.bins + 1, axis=1)
+
+        for j in range(self.n_columns):
+            idx = np.searchsorted(self.edges[j], values[:, j], side="right") - 1
+            np.clip(idx, 0, self.bins - 1, out=idx)
+            self.counts[j] += np.bincount(idx, minlength=self.bins)
+        self.total += len(values)
+        self.sum += values.sum(axis=0)
+
+    def quantile(self, q):
+        """Linear interpolation within the bin holding the q-th quantile (q in 0..1)."""
+        result = np.empty(self.n_columns)
+        target = q * self.total
+        for j in range(self.n_columns):
+            cumulative = np.cumsum(self.counts[j])
+            b = min(int(np.searchsorted(cumulative, target)), self.bins - 1)
+            before = cumulative[b - 1] if b > 0 else 0
+            inside = self.counts[j, b]
+            frac = (target - before) / inside if inside else 0.0
+            result[j] = self.edges[j, b] + frac * (self.edges[j, b + 1] - self.edges[j, b])
+        return result
+
+    def mean(self):
+        return self.sum / self.total
+
+
+def simulate_ebitda(initial_revenue, growth_dist, cogs_dist, opex_dist, years, n_paths=100_000,
+                    chunk_size=20_000, percentiles=(5, 50, 95), seed=None):
+    """Monte Carlo EBITDA bands; growth, COGS% and OpEx% are redrawn for every path and year.
+
+    Paths are generated chunk_size at a time and folded into streaming histograms,
+    so memory stays proportional to chunk_size * years whatever n_paths is.
+    """
+    rng = np.random.default_rng(seed)
+    ebitda_q = StreamingQuantiles(years)
+    revenue_sum = np.zeros(years)
+    negative = np.zeros(years, dtype=np.int64)
+
+    remaining = n_paths
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        growth = draw(growth_dist, rng, (n, years)) / 100.0
+        cogs = draw(cogs_dist, rng, (n, years)) / 100.0
+        opex = draw(opex_dist, rng, (n, years)) / 100.0
+
+        revenue = initial_revenue * np.cumprod(1 + growth, axis=1)
+        ebitda = revenue * (1 - cogs - opex)
+
+        ebitda_q.update(ebitda)
+        revenue_sum += revenue.sum(axis=0)
+        negative += (ebitda < 0).sum(axis=0)
+        remaining -= n
+
+    bands = pd.DataFrame({"Year": np.arange(1, years + 1)})
+    for p in percentiles:
+        bands[f"P{p}"] = ebitda_q.quantile(p / 100.0)
+    bands["Mean EBITDA (M)"] = ebitda_q.mean()
+    bands["Mean Revenue (M)"] = revenue_sum / n_paths
+    bands["P(EBITDA < 0)"] = negative / n_paths
+    return bands
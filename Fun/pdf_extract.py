@@ -0,0 +1,147 @@
+import hashlib
+import io
+import json
+import os
+import sys
+from collections import deque
+
+import pdfplumber
+from openpyxl import Workbook
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.disk_cache import evict_lru, touch, write_atomic
+from shared.parallel import pool_size, process_pool
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "PDF_TABLE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "pdf_tables")
+)
+
+
+class PageTableCache:
+    """On-disk store of extracted tables per page, evicting least recently used entries past max_bytes."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                tables = json.load(f)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return tables
+
+    def put(self, key, tables):
+        write_atomic(self._path(key), json.dumps(tables))
+
+    def evict(self):
+        evict_lru(self.cache_dir, self.max_bytes, suffixes=[".json"])
+
+
+def page_fingerprint(page, table_settings=None):
+    """Hash of the page's content streams, page box and extraction settings."""
+    h = hashlib.sha256()
+    h.update(json.dumps(table_settings or {}, sort_keys=True).encode())
+    h.update(repr(page.bbox).encode())
+    for stream in page.page_obj.contents:
+        h.update(stream.get_data())
+    return h.hexdigest()
+
+
+def extract_page_tables(page, cache=None, table_settings=None):
+    """Return (tables, from_cache) for one pdfplumber page, consulting the cache first."""
+    if cache is None:
+        return page.extract_tables(table_settings), False
+
+    key = page_fingerprint(page, table_settings)
+    tables = cache.get(key)
+    if tables is not None:
+        return tables, True
+    tables = page.extract_tables(table_settings)
+    cache.put(key, tables)
+    return tables, False
+
+
+def _extract_pages(pdf_path, page_numbers, cache_dir=None, table_settings=None):
+    """Extract the raw tables of a batch of pages; runs inside a worker process."""
+    cache = PageTableCache(cache_dir) if cache_dir else None
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for number in page_numbers:
+            page = pdf.pages[number]
+            tables, hit = extract_page_tables(page, cache, table_settings)
+            results.append((number, tables, hit))
+            page.close()  # drop pdfplumber's per-page object cache
+    return results
+
+
+def page_count(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_page_tables(pdf_path, workers=None, batch_size=4, cache_dir=None, table_settings=None):
+    """Yield (page_number, tables, from_cache) in page order while pages are extracted across worker processes.
+
+    At most a few batches per worker are in flight at once, so memory does not grow with the PDF.
+    With cache_dir set, unchanged pages are served from the PageTableCache instead of re-extracted.
+    """
+    total = page_count(pdf_path)
+    batches = [list(range(start, min(start + batch_size, total))) for start in range(0, total, batch_size)]
+    workers = pool_size(len(batches), workers)
+
+    if workers == 1:
+        for batch in batches:
+            yield from _extract_pages(pdf_path, batch, cache_dir, table_settings)
+        return
+
+    with process_pool(len(batches), workers) as pool:
+        pending = deque()
+        queued = iter(batches)
+        for batch in queued:
+            pending.append(pool.submit(_extract_pages, pdf_path, batch, cache_dir, table_settings))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            yield from pending.popleft().result()
+            next_batch = next(queued, None)
+            if next_batch is not None:
+                pending.append(pool.submit(_extract_pages, pdf_path, next_batch, cache_dir, table_settings))
+
+
+def stream_tables_to_excel(pdf_path, output=None, workers=None, progress=None, cache_dir=None):
+    """Write every table of the PDF to its own sheet as pages arrive, using a write-only workbook.
+
+    progress, if given, is called as progress(pages_done, total_pages, tables_written, pages_from_cache).
+    Returns (output, tables_written); output defaults to a new BytesIO positioned at 0.
+    """
+    output = output or io.BytesIO()
+    total = page_count(pdf_path)
+    workbook = Workbook(write_only=True)
+    written = cached = 0
+
+    pages = iter_page_tables(pdf_path, workers=workers, cache_dir=cache_dir)
+    for done, (_, tables, hit) in enumerate(pages, start=1):
+        cached += hit
+        for table in tables:
+            written += 1
+            sheet = workbook.create_sheet(f"Sheet{written}")
+            for row in table:
+                sheet.append(row)
+        if progress:
+            progress(done, total, written, cached)
+
+    if cache_dir:
+        PageTableCache(cache_dir).evict()
+    if written:
+        workbook.save(output)
+        if hasattr(output, "seek"):
+            output.seek(0)
+    return output, written
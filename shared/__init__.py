@@ -0,0 +1 @@
+"""Helpers shared by the Streamlit apps in this repository."""
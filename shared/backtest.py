@@ -0,0 +1,179 @@
+import itertools
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from shared.disk_cache import evict_lru, touch, write_atomic
+from shared.parallel import process_pool
+from shared.prophet_cache import Prophet, fingerprint
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "BACKTEST_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "backtest")
+)
+
+DEFAULT_GRID = {
+    "changepoint_prior_scale": [0.01, 0.05, 0.5],
+    "seasonality_mode": ["additive", "multiplicative"],
+}
+
+FoldResult = namedtuple("FoldResult", ["params", "cutoff", "mape", "rmse", "coverage", "seconds", "error", "cached"])
+
+
+def param_grid(grid):
+    """Every combination of a {name: [values]} grid, as a list of Prophet keyword dicts."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def rolling_origins(n_rows, horizon, n_folds=3, step=None, min_train=None):
+    """Training sizes for rolling-origin folds, each followed by `horizon` held-out rows.
+
+    The last fold ends at the last row; earlier folds move back by `step` rows (default
+    horizon). Folds that would leave fewer than min_train rows for training are dropped.
+    """
+    step = step or horizon
+    min_train = min_train or max(2 * horizon, 10)
+    sizes = [n_rows - horizon - k * step for k in range(n_folds)]
+    return sorted(size for size in sizes if size >= min_train)
+
+
+def fold_metrics(actual, forecast):
+    """MAPE (over non-zero actuals), RMSE and share of actuals inside the prediction interval."""
+    y = np.asarray(actual, dtype=float)
+    yhat = forecast["yhat"].to_numpy()
+    nonzero = y != 0
+    mape = float(np.mean(np.abs((y[nonzero] - yhat[nonzero]) / y[nonzero]))) if nonzero.any() else np.nan
+    rmse = float(np.sqrt(np.mean((y - yhat) ** 2)))
+    inside = (y >= forecast["yhat_lower"].to_numpy()) & (y <= forecast["yhat_upper"].to_numpy())
+    return mape, rmse, float(inside.mean())
+
+
+class FoldCache:
+    """Metrics of completed folds, one small JSON file per (data, split, params) fingerprint.
+
+    Least recently used files are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=64 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(data, train_size, horizon, params):
+        return fingerprint(data, {"params": params, "train_size": train_size, "horizon": horizon})
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                metrics = json.load(f)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return metrics
+
+    def put(self, key, metrics):
+        write_atomic(self._path(key), json.dumps(metrics))
+
+    def evict(self):
+        evict_lru(self.cache_dir, self.max_bytes, suffixes=[".json"])
+
+
+def _run_fold(train, test, params, cache_dir, key):
+    # Runs in a worker process
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    start = time.perf_counter()
+    cutoff = str(train["ds"].iloc[-1])
+    try:
+        model = Prophet(**params)
+        model.fit(train)
+        forecast = model.predict(test[["ds"]])
+        mape, rmse, coverage = fold_metrics(test["y"], forecast)
+    except Exception as e:
+        return FoldResult(params, cutoff, None, None, None, time.perf_counter() - start, f"{type(e).__name__}: {e}", False)
+
+    seconds = time.perf_counter() - start
+    FoldCache(cache_dir).put(key, {"mape": mape, "rmse": rmse, "coverage": coverage, "seconds": seconds})
+    return FoldResult(params, cutoff, mape, rmse, coverage, seconds, None, False)
+
+
+def run_backtest(df, grid=None, horizon=30, n_folds=3, step=None, max_workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Rolling-origin backtest of every grid cell, yielding a FoldResult per (params, fold) as it finishes.
+
+    Folds already in the cache are yielded first without refitting, so widening the grid
+    only computes the new cells. The rest are fitted in a process pool.
+    """
+    data = df[["ds", "y"]].sort_values("ds").reset_index(drop=True)
+    cache = FoldCache(cache_dir)
+    todo = []
+    for params in param_grid(grid or DEFAULT_GRID):
+        for train_size in rolling_origins(len(data), horizon, n_folds, step):
+            fold = data.iloc[:train_size + horizon]
+            key = cache.key(fold, train_size, horizon, params)
+            cutoff = str(data["ds"].iloc[train_size - 1])
+            metrics = cache.get(key)
+            if metrics is not None:
+                yield FoldResult(params, cutoff, metrics["mape"], metrics["rmse"], metrics["coverage"],
+                                 metrics["seconds"], None, True)
+            else:
+                todo.append((fold.iloc[:train_size], fold.iloc[train_size:], params, key))
+
+    if not todo:
+        return
+
+    with process_pool(len(todo), max_workers) as pool:
+        futures = {pool.submit(_run_fold, train, test, params, cache_dir, key): (train, params)
+                   for train, test, params, key in todo}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # worker crashed or result could not be unpickled
+                train, params = futures[future]
+                yield FoldResult(params, str(train["ds"].iloc[-1]), None, None, None, 0.0,
+                                 f"{type(e).__name__}: {e}", False)
+    # Workers write their folds; trim the directory once they are all in
+    cache.evict()
+
+
+def count_folds(n_rows, grid=None, horizon=30, n_folds=3, step=None):
+    return len(param_grid(grid or DEFAULT_GRID)) * len(rolling_origins(n_rows, horizon, n_folds, step))
+
+
+def summarize_backtest(results):
+    """One row per parameter set with mean metrics over its folds, best (lowest MAPE) first."""
+    rows = [
+        {**r.params, "mape": r.mape, "rmse": r.rmse, "coverage": r.coverage, "failed": r.error is not None,
+         "params": json.dumps(r.params, sort_keys=True)}
+        for r in results
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["params", "mape", "rmse", "coverage", "folds", "failed"])
+    frame = pd.DataFrame(rows)
+    names = [column for column in frame.columns if column not in ("mape", "rmse", "coverage", "failed", "params")]
+    summary = frame.groupby("params").agg(
+        **{name: (name, "first") for name in names},
+        mape=("mape", "mean"),
+        rmse=("rmse", "mean"),
+        coverage=("coverage", "mean"),
+        folds=("mape", "count"),
+        failed=("failed", "sum"),
+    )
+    return summary.sort_values(["mape", "rmse"], na_position="last").reset_index()
+
+
+def best_params(summary):
+    """Prophet keyword arguments of the best row of summarize_backtest, or {} if nothing succeeded."""
+    scored = summary.dropna(subset=["mape"])
+    if scored.empty:
+        return {}
+    return json.loads(scored["params"].iloc[0])
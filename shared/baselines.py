@@ -0,0 +1,288 @@
+"""Vectorized baseline forecasters and the engine registry shared by the forecasting apps.
+
+Array engines forecast every series of a long frame at once: the series are stacked into
+one right-aligned matrix (shorter histories padded with NaN on the left) and each engine
+works on whole columns, so thousands of series take milliseconds. Prophet is wrapped as
+one more engine behind the same interface; this module does not import it, so apps that
+pick a baseline never load Prophet or Stan.
+"""
+import abc
+
+import numpy as np
+import pandas as pd
+
+# z-score of an 80% interval, Prophet's default interval_width
+Z_80 = 1.2816
+
+SEASON_LENGTHS = {"D": 7, "W": 52, "M": 12, "Q": 4}
+
+
+def infer_offset(dates):
+    """Sampling frequency of a date column as a pandas offset (daily if it cannot be told)."""
+    dates = pd.DatetimeIndex(pd.Series(dates).dropna().sort_values().unique())
+    if len(dates) >= 3:
+        freq = pd.infer_freq(dates)
+        if freq:
+            return pd.tseries.frequencies.to_offset(freq)
+    if len(dates) < 2:
+        return pd.offsets.Day()
+
+    step = np.median(np.diff(dates.values)) / np.timedelta64(1, "D")
+    if step >= 80:
+        return pd.offsets.QuarterEnd()
+    if step >= 27:
+        return pd.offsets.MonthBegin() if (dates.day == 1).all() else pd.offsets.MonthEnd()
+    if step >= 6:
+        return pd.offsets.Week()
+    return pd.offsets.Day()
+
+
+def offset_kind(offset):
+    """One of D/W/M/Q (or None) for choosing a season length."""
+    name = offset.name.split("-")[0].upper()
+    if name.startswith("Q") or name.startswith("BQ"):
+        return "Q"
+    if name in ("M", "ME", "MS", "BM", "BME", "BMS", "SM", "SMS"):
+        return "M"
+    if name.startswith("W"):
+        return "W"
+    if name in ("D", "B", "C"):
+        return "D"
+    return None
+
+
+def season_length(offset):
+    return SEASON_LENGTHS.get(offset_kind(offset), 1)
+
+
+def horizon_steps(offset, days):
+    """Number of steps at this frequency needed to cover `days` days."""
+    step_days = {"D": 1, "W": 7, "M": 30.4375, "Q": 91.3125}.get(offset_kind(offset), 1)
+    return max(int(np.ceil(days / step_days)), 1)
+
+
+def prepare_long_frame(df, id_col="series_id", date_col="ds", value_col="y"):
+    """Normalise a long-format frame to series_id/ds/y, dropping unusable rows."""
+    data = df[[id_col, date_col, value_col]].rename(
+        columns={id_col: "series_id", date_col: "ds", value_col: "y"}
+    )
+    data["ds"] = pd.to_datetime(data["ds"], errors="coerce")
+    data["y"] = pd.to_numeric(data["y"], errors="coerce")
+    return data.dropna()
+
+
+def to_matrix(df):
+    """Stack a long series_id/ds/y frame into a right-aligned (n_series, n_time) array.
+
+    Returns the series ids, the matrix and each series' last date.
+    """
+    data = df[["series_id", "ds", "y"]].sort_values(["series_id", "ds"], kind="stable")
+    ids, start, counts = np.unique(data["series_id"].to_numpy(), return_index=True, return_counts=True)
+    width = counts.max()
+    Y = np.full((len(ids), width), np.nan)
+    rows = np.repeat(np.arange(len(ids)), counts)
+    cols = np.arange(len(data)) - np.repeat(start, counts) + np.repeat(width - counts, counts)
+    Y[rows, cols] = data["y"].to_numpy(dtype=float)
+    last = data["ds"].to_numpy()[start + counts - 1]
+    return ids, Y, pd.DatetimeIndex(last)
+
+
+def _first_valid(Y):
+    return np.argmax(~np.isnan(Y), axis=1)
+
+
+def _rms(residuals):
+    """Root mean square over the non-NaN entries of each row (0 for rows with none)."""
+    valid = ~np.isnan(residuals)
+    total = np.where(valid, residuals, 0.0) ** 2
+    return np.sqrt(total.sum(axis=1) / np.maximum(valid.sum(axis=1), 1))
+
+
+def _interval(yhat, sigma, scale):
+    spread = Z_80 * sigma[:, None] * scale
+    return yhat, yhat - spread, yhat + spread
+
+
+class ArrayEngine(abc.ABC):
+    """Base class: forecast(Y, horizon, m) returns (yhat, lower, upper) arrays of shape (n_series, horizon)."""
+
+    name = None
+
+    @abc.abstractmethod
+    def forecast(self, Y, horizon, m):
+        """Point forecasts and 80% bounds for every row of the right-aligned matrix Y."""
+
+    def forecast_long(self, df, periods, offset=None, season=None):
+        """Forecast every series of a long frame; returns series_id/ds/yhat/yhat_lower/yhat_upper rows."""
+        ids, Y, last = to_matrix(df)
+        offset = offset or infer_offset(df["ds"])
+        m = season or season_length(offset)
+        yhat, lower, upper = self.forecast(Y, periods, m)
+
+        if (last == last[0]).all():
+            future = pd.date_range(last[0], periods=periods + 1, freq=offset)[1:]
+            ds = np.tile(future.values, len(ids))
+        else:
+            ds = np.concatenate([pd.date_range(d, periods=periods + 1, freq=offset)[1:].values for d in last])
+        return pd.DataFrame({
+            "series_id": np.repeat(ids, periods),
+            "ds": ds,
+            "yhat": yhat.ravel(),
+            "yhat_lower": lower.ravel(),
+            "yhat_upper": upper.ravel(),
+        })
+
+
+class SeasonalNaive(ArrayEngine):
+    """Repeat the last observed season (plain naive when there is no seasonality)."""
+
+    name = "Seasonal naive"
+
+    def forecast(self, Y, horizon, m):
+        n = Y.shape[1]
+        length = n - _first_valid(Y)
+        # Series shorter than two seasons fall back to the last value
+        lag = np.where((m > 1) & (length >= 2 * m), m, 1)
+        steps = np.arange(horizon)
+        yhat = np.take_along_axis(Y, n - lag[:, None] + steps % lag[:, None], axis=1)
+
+        sigma = np.zeros(len(Y))
+        for value in np.unique(lag):
+            rows = lag == value
+            if n > value:
+                sigma[rows] = _rms(Y[rows, value:] - Y[rows, :-value])
+        return _interval(yhat, sigma, np.sqrt(steps // lag[:, None] + 1))
+
+
+class Drift(ArrayEngine):
+    """Straight line from each series' first to last observation, extended forward."""
+
+    name = "Drift"
+
+    def forecast(self, Y, horizon, m):
+        n = Y.shape[1]
+        first = _first_valid(Y)
+        length = n - first
+        slope = (Y[:, -1] - Y[np.arange(len(Y)), first]) / np.maximum(length - 1, 1)
+        steps = np.arange(1, horizon + 1)
+        yhat = Y[:, -1:] + slope[:, None] * steps
+
+        sigma = _rms(np.diff(Y, axis=1) - slope[:, None])
+        return _interval(yhat, sigma, np.sqrt(steps * (1 + steps / length[:, None])))
+
+
+class HoltWinters(ArrayEngine):
+    """Additive Holt-Winters (ETS A,A,A) with smoothing weights picked per series from a small grid.
+
+    Every (series, weights) pair runs through the same recursion as one row of a matrix, and
+    each series keeps the weights with the lowest in-sample one-step squared error.
+    """
+
+    name = "Holt-Winters"
+
+    def __init__(self, alphas=(0.1, 0.3, 0.5, 0.8), betas=(0.01, 0.1, 0.3), gammas=(0.05, 0.2, 0.5)):
+        self.weights = np.array([(a, b, g) for a in alphas for b in betas for g in gammas])
+
+    def forecast(self, Y, horizon, m):
+        n_series, n = Y.shape
+        first = _first_valid(Y)
+
+        # One row per (series, weights) combination
+        k = len(self.weights)
+        X = np.repeat(Y, k, axis=0)
+        start = np.repeat(first, k)
+        alpha, beta, gamma = (np.tile(self.weights[:, i], n_series) for i in range(3))
+        rows = np.arange(len(X))
+
+        # Series with two full seasons start from seasonal averages; shorter ones from their first points
+        seasonal = (n - start >= 2 * m) if m > 1 else np.zeros(len(X), dtype=bool)
+        m = max(m, 1)
+        warmup = np.where(seasonal, m, 1)
+        season = np.zeros((len(X), m))
+        level = X[rows, start]
+        second = X[rows, np.minimum(start + 1, n - 1)]
+        trend = np.nan_to_num(second - level)
+        if seasonal.any():
+            season_idx = np.minimum(start[:, None] + np.arange(m), n - 1)
+            first_season = X[rows[:, None], season_idx]
+            second_season = X[rows[:, None], np.minimum(season_idx + m, n - 1)]
+            season_level = first_season.mean(axis=1)
+            level = np.where(seasonal, season_level, level)
+            trend = np.where(seasonal, (second_season.mean(axis=1) - season_level) / m, trend)
+            phase = season_idx % m
+            season[rows[:, None], phase] = np.where(seasonal[:, None], first_season - season_level[:, None], 0.0)
+
+        sse = np.zeros(len(X))
+        count = np.zeros(len(X))
+        for t in range((start + warmup).min(), n):
+            y = X[:, t]
+            active = (t >= start + warmup) & ~np.isnan(y)
+            s = season[:, t % m]
+            error = y - (level + trend + s)
+            sse += np.where(active, error ** 2, 0.0)
+            count += active
+
+            new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+            new_trend = beta * (new_level - level) + (1 - beta) * trend
+            new_season = gamma * (y - new_level) + (1 - gamma) * s
+            season[:, t % m] = np.where(active & seasonal, new_season, s)
+            level = np.where(active, new_level, level)
+            trend = np.where(active, new_trend, trend)
+
+        mse = (sse / np.maximum(count, 1)).reshape(n_series, k)
+        best = np.argmin(mse, axis=1) + np.arange(n_series) * k
+        steps = np.arange(1, horizon + 1)
+        yhat = level[best, None] + trend[best, None] * steps + season[best][:, (n - 1 + steps) % m]
+        return _interval(yhat, np.sqrt(mse.min(axis=1)), np.sqrt(steps))
+
+
+class ProphetEngine:
+    """Prophet behind the engine interface: one model per series, fitted in a process pool.
+
+    on_result, if given, is called as on_result(done, total, SeriesForecast) as each series
+    finishes. Series that failed are listed in `failures` after forecast_long.
+    """
+
+    name = "Prophet"
+
+    def __init__(self, params=None, cache_dir=None, timeout=120, on_result=None):
+        self.params = params or {}
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.on_result = on_result
+        self.failures = []
+
+    def forecast_long(self, df, periods, offset=None, season=None):
+        # Imported here so that only Prophet users pay for loading Prophet and Stan
+        from shared.batch_forecast import combine_forecasts, forecast_batch
+
+        offset = offset or infer_offset(df["ds"])
+        total = df["series_id"].nunique()
+        results = []
+        for result in forecast_batch(df, periods=periods, freq=offset, params=self.params,
+                                     timeout=self.timeout, cache_dir=self.cache_dir):
+            results.append(result)
+            if self.on_result:
+                self.on_result(len(results), total, result)
+        self.failures = [{"series_id": r.series_id, "error": r.error} for r in results if r.error]
+        combined = combine_forecasts(results)
+        # Prophet also returns the fitted history; keep the future rows only
+        last = df.groupby("series_id")["ds"].max()
+        return combined[combined["ds"] > combined["series_id"].map(last)].reset_index(drop=True)
+
+
+ENGINES = {engine.name: engine for engine in (SeasonalNaive(), Drift(), HoltWinters())}
+ENGINE_NAMES = ["Prophet"] + list(ENGINES)
+
+
+def get_engine(name, **prophet_options):
+    """Engine instance by display name; Prophet options are passed to ProphetEngine."""
+    if name == "Prophet":
+        return ProphetEngine(**prophet_options)
+    return ENGINES[name]
+
+
+def forecast_series(df, engine, periods, offset=None):
+    """Single-series convenience: ds/y frame in, ds/yhat/yhat_lower/yhat_upper future rows out."""
+    long_df = df[["ds", "y"]].dropna().assign(series_id=0)
+    return engine.forecast_long(long_df, periods, offset).drop(columns=["series_id"])
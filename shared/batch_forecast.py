@@ -0,0 +1,142 @@
+import multiprocessing.connection
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from shared.parallel import pool_size, spawn_context
+from shared.prophet_cache import Prophet, ProphetModelCache
+
+SeriesForecast = namedtuple("SeriesForecast", ["series_id", "forecast", "error", "seconds"])
+
+
+def _fit_one(series_id, data, periods, freq, params, cache_dir):
+    start = time.perf_counter()
+    try:
+        if cache_dir:
+            model = ProphetModelCache(cache_dir).get_or_fit(data, **params)
+        else:
+            model = Prophet(**params)
+            model.fit(data)
+        future = model.make_future_dataframe(periods=periods, freq=freq)
+        forecast = model.predict(future)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+        return SeriesForecast(series_id, forecast, None, time.perf_counter() - start)
+    except Exception as e:
+        return SeriesForecast(series_id, None, f"{type(e).__name__}: {e}", time.perf_counter() - start)
+
+
+def _worker_loop(conn):
+    # Runs in a worker process. Loading the Stan backend happens before reporting ready,
+    # so start-up time never counts against a series' deadline.
+    Prophet()
+    conn.send("ready")
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        conn.send(_fit_one(*task))
+
+
+class _Worker:
+    """A fitting process with its own pipe, so it can be killed on a deadline without affecting others."""
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.series_id = None
+        self.started = None
+
+    def submit(self, series_id, task):
+        self.series_id = series_id
+        self.started = time.perf_counter()
+        self.conn.send(task)
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+def forecast_batch(df, periods, freq="D", params=None, max_workers=None, timeout=120, cache_dir=None,
+                   min_points=2):
+    """Fit one Prophet model per series in a process pool and yield each SeriesForecast as it finishes.
+
+    df must be in long format with series_id, ds and y columns (see baselines.prepare_long_frame).
+    Series that fail, time out or are too short are yielded with the error field set; a fit
+    running longer than `timeout` seconds has its worker process killed and replaced.
+    """
+    params = params or {}
+    groups = []
+    for series_id, group in df.groupby("series_id", sort=False):
+        group = group[["ds", "y"]].sort_values("ds").reset_index(drop=True)
+        if len(group) < min_points:
+            yield SeriesForecast(series_id, None, f"needs at least {min_points} observations", 0.0)
+            continue
+        groups.append((series_id, group))
+
+    if not groups:
+        return
+
+    context = spawn_context()
+    pool = [_Worker(context) for _ in range(pool_size(len(groups), max_workers))]
+    pending = list(reversed(groups))
+    try:
+        # The deadline is enforced here: a worker that overruns is killed and replaced
+        while pending or any(worker.series_id is not None for worker in pool):
+            busy = [worker for worker in pool if worker.series_id is not None]
+            wait_for = None
+            if timeout and busy:
+                wait_for = max(min(worker.started for worker in busy) + timeout - time.perf_counter(), 0)
+            watched = [worker.conn for worker in pool if not worker.ready or worker.series_id is not None]
+            ready = multiprocessing.connection.wait(watched, timeout=wait_for)
+
+            for i, worker in enumerate(pool):
+                result = None
+                if worker.conn in ready:
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        if worker.series_id is None:
+                            raise RuntimeError("forecast worker process failed to start")
+                        elapsed = time.perf_counter() - worker.started
+                        result = SeriesForecast(worker.series_id, None, "RuntimeError: worker process exited", elapsed)
+                        worker.stop(kill=True)
+                        worker = pool[i] = _Worker(context)
+                    else:
+                        if message == "ready":
+                            worker.ready = True
+                        else:
+                            result = message
+                            worker.series_id = None
+                elif worker.series_id is not None and timeout and time.perf_counter() - worker.started >= timeout:
+                    elapsed = time.perf_counter() - worker.started
+                    result = SeriesForecast(worker.series_id, None, f"TimeoutError: fit exceeded {timeout}s", elapsed)
+                    worker.stop(kill=True)
+                    worker = pool[i] = _Worker(context)
+
+                if worker.ready and worker.series_id is None and pending:
+                    series_id, group = pending.pop()
+                    worker.submit(series_id, (series_id, group, periods, freq, params, cache_dir))
+                if result is not None:
+                    yield result
+    finally:
+        for worker in pool:
+            worker.stop(kill=worker.series_id is not None or not worker.ready)
+
+
+def combine_forecasts(results):
+    """Stack successful SeriesForecast results into one long frame."""
+    frames = [r.forecast.assign(series_id=r.series_id) for r in results if r.forecast is not None]
+    if not frames:
+        return pd.DataFrame(columns=["series_id", "ds", "yhat", "yhat_lower", "yhat_upper"])
+    combined = pd.concat(frames, ignore_index=True)
+    return combined[["series_id", "ds", "yhat", "yhat_lower", "yhat_upper"]]
@@ -0,0 +1,50 @@
+"""File helpers shared by the on-disk caches: atomic writes, recency marks and size-limited LRU eviction."""
+import os
+import threading
+
+
+def write_atomic(path, data):
+    """Write str or bytes to path through a temporary file, so readers never see a partial file."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def touch(path):
+    """Mark a cache file as recently used for eviction."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # evicted by another process in the meantime
+
+
+def evict_lru(cache_dir, max_bytes, suffixes=None):
+    """Delete the least recently modified files until the directory fits within max_bytes.
+
+    Only files ending in one of suffixes are counted (all but temporary files when None).
+    Returns the number of bytes freed.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".tmp") or (suffixes and not name.endswith(tuple(suffixes))):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        freed += size
+    return freed
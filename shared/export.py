@@ -0,0 +1,177 @@
+import hashlib
+import importlib.util
+import io
+import math
+import pickle
+import re
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+Export = namedtuple("Export", ["data", "file_name", "mime"])
+
+MIMES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "zip": "application/zip",
+}
+
+
+def available_formats():
+    """Export formats usable in this environment (Parquet needs pyarrow or fastparquet)."""
+    formats = ["xlsx", "csv"]
+    if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+        formats.append("parquet")
+    return formats
+
+
+def sheet_title(name, used):
+    """Valid, unique Excel sheet name: at most 31 characters, none of []:*?/\\."""
+    title = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:31] or "Sheet"
+    base, n = title, 1
+    while title.lower() in used:
+        n += 1
+        title = f"{base[:31 - len(str(n)) - 1]}_{n}"
+    used.add(title.lower())
+    return title
+
+
+def _cell(value):
+    # openpyxl accepts plain Python scalars only; NaN/NaT become empty cells
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.tz_localize(None).to_pydatetime() if value.tzinfo else value.to_pydatetime()
+    if isinstance(value, datetime) and value.tzinfo:
+        return value.replace(tzinfo=None)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    return str(value)
+
+
+def _column_values(series):
+    """Column as a list of openpyxl-ready Python values, converted per column rather than per cell."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    if series.dtype.kind in "biufM":
+        return series.astype(object).where(series.notna(), None).tolist()
+    return [_cell(value) for value in series.tolist()]
+
+
+def frames_to_xlsx(sheets, index=True):
+    """Write {sheet name: frame} with openpyxl's write-only mode, streaming rows instead of building cells."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used = set()
+    for name, frame in sheets.items():
+        sheet = workbook.create_sheet(sheet_title(name, used))
+        header = ([frame.index.name or ""] if index else []) + list(frame.columns)
+        sheet.append([_cell(value) for value in header])
+        columns = [_column_values(frame.iloc[:, i]) for i in range(frame.shape[1])]
+        if index:
+            columns.insert(0, _column_values(frame.index.to_series()))
+        for row in zip(*columns):
+            sheet.append(row)
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def _frame_bytes(frame, fmt, index):
+    if fmt == "csv":
+        return frame.to_csv(index=index).encode()
+    output = io.BytesIO()
+    # Parquet needs string column names
+    frame.rename(columns=str).to_parquet(output, index=index)
+    return output.getvalue()
+
+
+def frames_to_files(sheets, fmt, index=True):
+    """CSV or Parquet bytes for one frame, or a zip holding one file per frame."""
+    if len(sheets) == 1:
+        return _frame_bytes(next(iter(sheets.values())), fmt, index), fmt
+
+    output = io.BytesIO()
+    used = set()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, frame in sheets.items():
+            archive.writestr(f"{sheet_title(name, used)}.{fmt}", _frame_bytes(frame, fmt, index))
+    return output.getvalue(), "zip"
+
+
+def content_key(sheets, fmt, index=True):
+    """Hash of the frames (values, index and columns) plus the export options."""
+    h = hashlib.sha256(f"{fmt}:{index}".encode())
+    for name, frame in sheets.items():
+        h.update(str(name).encode())
+        h.update(repr(list(frame.columns)).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+        except TypeError:  # unhashable cells such as lists
+            h.update(pickle.dumps(frame))
+    return h.hexdigest()
+
+
+class ExportCache:
+    """Rendered export bytes keyed by content hash, kept in memory up to max_bytes (LRU)."""
+
+    def __init__(self, max_bytes=128 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self._size += len(value[0])
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, (data, _) = self._items.popitem(last=False)
+                self._size -= len(data)
+
+
+_default_cache = ExportCache()
+
+
+def export_frames(sheets, fmt="xlsx", stem="export", index=True, cache=None):
+    """Render {name: frame} as an in-memory Export, reusing bytes already rendered for the same content.
+
+    xlsx puts every frame on its own sheet; csv and parquet give one file, or a zip of
+    files when there are several frames. Nothing touches the working directory.
+    """
+    cache = cache or _default_cache
+    key = content_key(sheets, fmt, index)
+    rendered = cache.get(key)
+    if rendered is None:
+        if fmt == "xlsx":
+            rendered = (frames_to_xlsx(sheets, index), "xlsx")
+        else:
+            rendered = frames_to_files(sheets, fmt, index)
+        cache.put(key, rendered)
+
+    data, extension = rendered
+    return Export(data, f"{stem}.{extension}", MIMES[extension])
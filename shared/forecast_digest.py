@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from shared.llm import estimate_tokens
+
+# How the peak of each seasonality is described
+PEAK_FORMATS = {"yearly": "%B", "weekly": "%A", "daily": "%H:00"}
+
+# Coarser periods are tried in turn until the digest fits the budget
+AGGREGATION_LEVELS = [("M", "Monthly"), ("Q", "Quarterly"), ("Y", "Yearly")]
+
+
+def compact(x):
+    """Short human-readable number: 1234567 -> 1.23M."""
+    if x is None or not np.isfinite(x):
+        return "n/a"
+    for size, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(x) >= size:
+            return f"{x / size:.2f}{suffix}"
+    return f"{x:.2f}"
+
+
+def horizon(forecast, history=None):
+    """Rows of a Prophet forecast after the last observed date (all rows without history)."""
+    if history is None or history.empty:
+        return forecast
+    return forecast[forecast["ds"] > history["ds"].max()]
+
+
+def overview_lines(future, history=None):
+    start, end = future["ds"].iloc[0], future["ds"].iloc[-1]
+    lines = [f"Horizon: {start:%Y-%m-%d} to {end:%Y-%m-%d} ({len(future)} periods)"]
+    if history is not None and not history.empty:
+        last = history.sort_values("ds")["y"].iloc[-1]
+        lines.append(f"Last actual: {compact(last)} on {history['ds'].max():%Y-%m-%d}")
+    first, final = future["yhat"].iloc[0], future["yhat"].iloc[-1]
+    change = (final - first) / abs(first) if first else np.nan
+    lines.append(f"Forecast: {compact(first)} at start, {compact(final)} at end ({change:+.1%})")
+    lines.append(f"Range: min {compact(future['yhat'].min())}, max {compact(future['yhat'].max())}, "
+                 f"total {compact(future['yhat'].sum())}")
+
+    width = future["yhat_upper"] - future["yhat_lower"]
+    relative = (width / future["yhat"].abs().replace(0, np.nan)).mean()
+    lines.append(f"Interval width: {compact(width.iloc[0])} at start, {compact(width.iloc[-1])} at end "
+                 f"(avg {relative:.1%} of forecast)")
+    return lines
+
+
+def trend_lines(future, model=None, max_changepoints=5):
+    lines = []
+    if "trend" in future and len(future) > 1:
+        days = (future["ds"] - future["ds"].iloc[0]).dt.total_seconds() / 86400
+        slope = np.polyfit(days, future["trend"], 1)[0] * 30.4375
+        lines.append(f"Trend slope: {compact(slope)} per month")
+
+    if model is not None and getattr(model, "params", None) and len(getattr(model, "changepoints", [])):
+        # delta is the rate change at each potential changepoint, in scaled y per scaled time
+        days = model.t_scale / pd.Timedelta(days=1)
+        deltas = np.asarray(model.params["delta"]).mean(axis=0) * model.y_scale / days * 30.4375
+        order = np.argsort(-np.abs(deltas))[:max_changepoints]
+        significant = [i for i in sorted(order) if abs(deltas[i]) > 0.01 * np.abs(deltas).max()]
+        if significant:
+            changes = ", ".join(
+                f"{pd.Timestamp(model.changepoints.iloc[i]):%Y-%m-%d} ({'+' if deltas[i] > 0 else '-'}{compact(abs(deltas[i]))})"
+                for i in significant
+            )
+            lines.append(f"Largest trend changepoints (slope change per month): {changes}")
+    return lines
+
+
+def seasonality_lines(future, model=None):
+    names = list(getattr(model, "seasonalities", {}) or {}) if model is not None else []
+    names = names or [name for name in ("yearly", "weekly", "daily") if name in future]
+    multiplicative = getattr(model, "seasonality_mode", "additive") == "multiplicative"
+
+    lines = []
+    for name in names:
+        if name not in future:
+            continue
+        component = future[name]
+        amplitude = (component.max() - component.min()) / 2
+        peak = future["ds"].iloc[int(component.to_numpy().argmax())]
+        size = f"{amplitude:.1%} of trend" if multiplicative else compact(amplitude)
+        lines.append(f"{name.capitalize()} seasonality: amplitude ±{size}, peak {peak:{PEAK_FORMATS.get(name, '%Y-%m-%d')}}")
+    return lines
+
+
+def step_label(future):
+    """What one forecast row covers, for labelling per-period averages."""
+    if len(future) < 2:
+        return "per step"
+    days = future["ds"].diff().median() / pd.Timedelta(days=1)
+    for limit, label in ((1.5, "daily"), (8, "weekly"), (32, "monthly"), (93, "quarterly")):
+        if days <= limit:
+            return label
+    return "per step"
+
+
+def aggregate_table(future, level, max_rows=None):
+    """Mean forecast and mean interval bounds per period, flagging periods the horizon only partly covers.
+
+    Means keep partial first and last periods comparable with full ones; summed quantiles
+    would not be an interval for the total anyway.
+    """
+    periods = future["ds"].dt.to_period(level)
+    table = future.groupby(periods)[["yhat", "yhat_lower", "yhat_upper"]].mean()
+
+    step = future["ds"].diff().median() if len(future) > 1 else pd.Timedelta(days=1)
+    first, last = table.index[0], table.index[-1]
+    partial = set()
+    if future["ds"].iloc[0] - first.start_time >= step:
+        partial.add(first)
+    if last.end_time - future["ds"].iloc[-1] >= step:
+        partial.add(last)
+
+    if max_rows and len(table) > max_rows:
+        # Keep evenly spaced rows, always including the first and the last period
+        table = table.iloc[np.unique(np.linspace(0, len(table) - 1, max_rows).round().astype(int))]
+    return [
+        f"{period}: {compact(row.yhat)} [{compact(row.yhat_lower)}, {compact(row.yhat_upper)}]"
+        + (" (partial period)" if period in partial else "")
+        for period, row in table.iterrows()
+    ]
+
+
+def table_header(label, future):
+    unit = step_label(future)
+    return f"{label} average {unit} forecast [average {unit} lower, upper bound]:"
+
+
+def forecast_digest(forecast, history=None, model=None, max_tokens=800):
+    """Fixed-size text summary of a Prophet forecast for an LLM prompt.
+
+    Covers the horizon overview, interval widths, trend slope and changepoints, seasonality
+    amplitudes and per-period averages. Averages switch to coarser periods, then fewer rows,
+    until the digest fits within about max_tokens, so its size does not grow with the horizon.
+    """
+    future = horizon(forecast, history)
+    if future.empty:
+        return "No forecast periods beyond the observed data."
+
+    header = overview_lines(future, history) + trend_lines(future, model) + seasonality_lines(future, model)
+    digest = "\n".join(header)
+
+    for level, label in AGGREGATION_LEVELS:
+        rows = aggregate_table(future, level)
+        text = "\n".join([digest, table_header(label, future)] + rows)
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+    # Still too long: thin the yearly rows to what fits
+    level, label = AGGREGATION_LEVELS[-1]
+    row_tokens = estimate_tokens(rows[0]) + 1
+    room = max((max_tokens - estimate_tokens(digest)) // row_tokens - 1, 2)
+    if len(rows) > room:
+        rows = aggregate_table(future, level, max_rows=room)
+        label = f"{label} (selected years)"
+    return "\n".join([digest, table_header(label, future)] + rows)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from groq import Groq
+
+from shared.disk_cache import evict_lru, touch, write_atomic
+
+DEFAULT_MODEL = "llama3-8b-8192"
+DEFAULT_CACHE_DIR = os.getenv(
+    "LLM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "llm")
+)
+
+
+class StreamAbandoned(Exception):
+    """The request that others were waiting on stopped before the response was complete."""
+
+
+def prompt_key(model, messages, params):
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Completed responses keyed by prompt hash: in-process LRU plus JSON files on disk, both with a TTL.
+
+    Expired files are deleted when read, and least recently used ones once the directory
+    grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=24 * 3600, max_memory_items=256,
+                 max_disk_bytes=128 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - entry["created"] > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already removed by another session
+            return None
+        touch(path)
+        self._remember(key, entry["created"], entry["text"])
+        return entry["text"]
+
+    def set(self, key, text):
+        created = time.time()
+        self._remember(key, created, text)
+        if self.cache_dir:
+            write_atomic(self._path(key), json.dumps({"created": created, "text": text}))
+            evict_lru(self.cache_dir, self.max_disk_bytes, suffixes=[".json"])
+
+    def _remember(self, key, created, text):
+        with self._lock:
+            self._memory[key] = (created, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+
+class LLMClient:
+    """One pooled Groq client per process with response caching, streaming and request coalescing.
+
+    Identical prompts that are already in flight are not sent again: later callers wait for
+    the first response. Pass base_url (or set GROQ_BASE_URL) to point at a local mock server.
+    """
+
+    def __init__(self, api_key, base_url=None, model=DEFAULT_MODEL, cache=None):
+        self.model = model
+        self.client = Groq(api_key=api_key, base_url=base_url or os.getenv("GROQ_BASE_URL"))
+        self.cache = cache if cache is not None else ResponseCache()
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        # The client is shared by every session, so counters are updated under the lock
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _claim(self, key):
+        """Return (future, owner): owner is True when this caller must send the request."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _release(self, key, future, text=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(text)
+
+    def complete(self, messages, model=None, **params):
+        """Return the full response text for a chat prompt."""
+        return "".join(self.stream(messages, model=model, **params))
+
+    def stream(self, messages, model=None, **params):
+        """Yield the response text as it arrives; cached or coalesced responses arrive as one piece."""
+        model = model or self.model
+        key = prompt_key(model, messages, params)
+
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("hits")
+                yield cached
+                return
+
+            future, owner = self._claim(key)
+            if not owner:
+                try:
+                    text = future.result()
+                except StreamAbandoned:
+                    continue  # the first caller gave up; try again ourselves
+                self._count("hits")
+                yield text
+                return
+            break
+
+        self._count("misses")
+        parts = []
+        try:
+            response = self.client.chat.completions.create(messages=messages, model=model, stream=True, **params)
+            for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except GeneratorExit:
+            self._release(key, future, error=StreamAbandoned())
+            raise
+        except Exception as e:
+            self._release(key, future, error=e)
+            raise
+
+        text = "".join(parts)
+        self.cache.set(key, text)
+        self._release(key, future, text=text)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm(api_key, base_url=None):
+    """Process-wide LLMClient for the given credentials, created on first use."""
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = LLMClient(api_key, base_url=base_url)
+            _clients[(api_key, base_url)] = client
+        return client
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def chat_messages(system, prompt):
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt},
+    ]
@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def available_cores():
+    """Number of CPUs this process may actually run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def spawn_context():
+    # spawn avoids forking the threaded Streamlit server
+    return multiprocessing.get_context("spawn")
+
+
+def pool_size(n_tasks, max_workers=None):
+    """Workers worth starting for n_tasks: at most max_workers (default: available cores), at least 1."""
+    return max(min(max_workers or available_cores(), n_tasks), 1)
+
+
+def process_pool(n_tasks, max_workers=None):
+    """Spawn-based ProcessPoolExecutor sized for n_tasks."""
+    return ProcessPoolExecutor(max_workers=pool_size(n_tasks, max_workers), mp_context=spawn_context())
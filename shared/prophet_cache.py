@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from shared.disk_cache import evict_lru, touch, write_atomic
+
+try:
+    from prophet import Prophet
+    from prophet.serialize import model_from_json, model_to_json
+except ImportError:  # older installs ship the package as fbprophet
+    from fbprophet import Prophet
+    from fbprophet.serialize import model_from_json, model_to_json
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "PROPHET_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "apps", "prophet")
+)
+
+
+# How a model was obtained by get_or_update, and the estimated cost of fitting it from scratch
+FitInfo = namedtuple("FitInfo", ["mode", "seconds", "cold_seconds", "new_rows"])
+
+
+def fingerprint(df, params=None):
+    """Hash the cleaned ds/y frame together with the model hyperparameters."""
+    data = df[["ds", "y"]].sort_values("ds").reset_index(drop=True)
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def warm_start_params(model):
+    """Fitted parameters of a model in the form Prophet.fit(init=...) expects."""
+    res = {}
+    for name in ["k", "m", "sigma_obs"]:
+        res[name] = model.params[name][0][0] if model.mcmc_samples == 0 else np.mean(model.params[name])
+    for name in ["delta", "beta"]:
+        res[name] = model.params[name][0] if model.mcmc_samples == 0 else np.mean(model.params[name], axis=0)
+    return res
+
+
+def future_frame(df, periods, freq="D"):
+    """History dates of df followed by `periods` future dates, for predict()."""
+    last = df["ds"].max()
+    future = pd.date_range(last, periods=periods + 1, freq=freq)[1:]
+    return pd.DataFrame({"ds": pd.concat([df["ds"].sort_values(), pd.Series(future)], ignore_index=True)})
+
+
+def interval_coverage(model, new_rows):
+    """Share of new actuals that fall inside a model's prediction interval."""
+    forecast = model.predict(new_rows[["ds"]])
+    y = new_rows["y"].to_numpy()
+    return float(((y >= forecast["yhat_lower"].to_numpy()) & (y <= forecast["yhat_upper"].to_numpy())).mean())
+
+
+class ProphetModelCache:
+    """Two-tier store of fitted Prophet models: in-process LRU backed by JSON files on disk."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_items=16, max_disk_bytes=256 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                model = model_from_json(f.read())
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        self._remember(key, model)
+        return model
+
+    def put(self, key, model):
+        self._remember(key, model)
+        write_atomic(self._path(key), model_to_json(model))
+        self._evict_disk()
+
+    def get_or_fit(self, df, **params):
+        """Return the fitted model for df/params, fitting Prophet only on a cache miss."""
+        key = fingerprint(df, params)
+        model = self.get(key)
+        if model is None:
+            model = Prophet(**params)
+            model.fit(df)
+            self.put(key, model)
+        return model
+
+    def get_or_update(self, df, threshold=0.02, **params):
+        """Like get_or_fit, but builds on an earlier fit when df only appends rows to its data.
+
+        If a cached model was fitted on a prefix of df with the same params, the new fit starts
+        from its parameters (warm start). When the appended rows are at most `threshold` of the
+        model's history and fall inside its prediction interval as often as expected, the
+        earlier model is reused without fitting. Returns (model, FitInfo).
+        """
+        start = time.perf_counter()
+        data = df[["ds", "y"]].sort_values("ds").reset_index(drop=True)
+        key = fingerprint(data, params)
+        model = self.get(key)
+        if model is not None:
+            entry = self._lineage(data, params).get(key, {})
+            return model, FitInfo("cached", time.perf_counter() - start, entry.get("cold_seconds"), 0)
+
+        base = self._find_prefix(data, params)
+        if base is None:
+            model = Prophet(**params)
+            model.fit(data)
+            mode = "cold"
+            cold_seconds = time.perf_counter() - start
+            new_rows = len(data)
+        else:
+            old, entry = base
+            trained = len(old.history)
+            new_rows = len(data) - trained
+            # Fit time grows roughly linearly with history length
+            cold_seconds = entry["cold_seconds"] * len(data) / entry["n_rows"]
+            if new_rows <= threshold * trained and interval_coverage(old, data.iloc[trained:]) >= old.interval_width:
+                model, mode = old, "reused"
+            else:
+                try:
+                    model = Prophet(**params)
+                    model.fit(data, init=warm_start_params(old))
+                    mode = "warm"
+                except Exception:  # e.g. a seasonality switched on by the longer history changes the shapes
+                    model = Prophet(**params)
+                    model.fit(data)
+                    mode = "cold"
+
+        seconds = time.perf_counter() - start
+        if mode == "cold":
+            cold_seconds = seconds
+        self.put(key, model)
+        self._record(data, params, key, cold_seconds)
+        return model, FitInfo(mode, seconds, cold_seconds, new_rows)
+
+    def _lineage_path(self, data, params):
+        # Fits of the same series (same first date and params) share one small index file
+        h = hashlib.sha256(json.dumps([str(data["ds"].iloc[0]), params], sort_keys=True, default=str).encode())
+        return os.path.join(self.cache_dir, f"lineage-{h.hexdigest()[:32]}.idx")
+
+    def _lineage(self, data, params):
+        path = self._lineage_path(data, params)
+        try:
+            with open(path, "r") as f:
+                lineage = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        touch(path)
+        return lineage
+
+    def _record(self, data, params, key, cold_seconds, max_entries=12):
+        with self._lock:
+            lineage = self._lineage(data, params)
+            lineage[key] = {"n_rows": len(data), "cold_seconds": cold_seconds}
+            latest = sorted(lineage.items(), key=lambda item: item[1]["n_rows"])[-max_entries:]
+            write_atomic(self._lineage_path(data, params), json.dumps(dict(latest)))
+
+    def _find_prefix(self, data, params):
+        """Longest cached fit whose data is a strict prefix of data, as (model, lineage entry)."""
+        lineage = self._lineage(data, params)
+        for key, entry in sorted(lineage.items(), key=lambda item: -item[1]["n_rows"]):
+            n = entry["n_rows"]
+            if n >= len(data) or fingerprint(data.iloc[:n], params) != key:
+                continue
+            model = self.get(key)
+            if model is not None:
+                return model, entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((".json", ".idx")):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._memory[key] = model
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Lineage indexes count against the budget too, so the directory cannot grow without bound
+        evict_lru(self.cache_dir, self.max_disk_bytes, suffixes=[".json", ".idx"])